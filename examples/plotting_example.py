@@ -11,6 +11,11 @@ def setup():
     plt0 = py5gui.Plot(x=10, y= 10, w=500, h=500)
     plt1 = py5gui.Plot( x=10, y=570, w=500, h=200, sketch=py5.get_current_sketch())
 
+    # streamed series stay attached to plt0 and are appended to instead of resubmitted every frame
+    global stream0, stream1
+    stream0 = plt0.stream(capacity=5_000, color=(0, 255, 255), stroke_weight=3)
+    stream1 = plt0.stream(capacity=5_000, color=(255, 0, 0))
+
     xs = [0]
     ys0 = [0]
     ys1 = [0]
@@ -26,8 +31,6 @@ def draw():
     global plt0, plt1, xs, ys0, ys1, scatter_y, scatter_col, vlines, scatter_choice
     py5.background(0)
 
-    plt0.plot(xs, ys0, color=(0, 255, 255), stroke_weight=3)
-    plt0.plot(xs, ys1, color=(255, 0, 0))
     plt0.scatter(xs, scatter_y, diameter=7, marker='circle')
     plt0.show(title='3 plots', xlabel='x axis', ylabel='y axis') #, ylimit=(-10, None))
 
@@ -55,6 +58,8 @@ def draw():
     xs.append(x)
     ys0.append(ys0[-1] + py5.random(-1., 1.))
     ys1.append(ys1[-1] + py5.random(-1., 1.))
+    stream0.append(x, ys0[-1])
+    stream1.append(x, ys1[-1])
     if random.random() < 0.01:
         vlines.append(x)# + random.uniform(-10, 10))
     scatter_y.append(scatter_y[-1] + py5.random(-1., 1.))
@@ -16,6 +16,17 @@ print_input = lambda value : print(value)
 def key_pressed(key_event): pass
     # this function is required for text inputs to be able to hook into key presses
 
+def key_released(key_event): pass
+    # lets shift+tab move the focus back to the previous text input
+
+def mouse_pressed(mouse_event): pass
+def mouse_released(mouse_event): pass
+    # with these functions the elements also receive clicks that start and end between two frames
+
+def mouse_wheel(mouse_event):
+    # hovered sliders step their value with the mouse wheel
+    ui.connect_mouse_wheel(mouse_event)
+
 def setup():
     py5.size(500, 500, py5.P2D)
     py5.background(0)
@@ -81,6 +92,7 @@ def draw():
     global background_color
     py5.background(*background_color)
     ui.run()
+    # ui.run(retained=True) would instead only redraw elements that changed into a cached layer
     
     # use the following line instead to just run the element stored in my_inputs[0]
     # py5.get_current_sketch().my_inputs[0].run()
@@ -1,18 +1,25 @@
 import os
-from .utils.plot import Plot, legend    # the relative . is important for a pip install to find modules relative to the parent package (from py5gui.utils.plot import... would also work)
+from .utils.plot import Plot, legend, StreamingSeries    # the relative . is important for a pip install to find modules relative to the parent package (from py5gui.utils.plot import... would also work)
+from .utils.text_metrics import text_metrics
+from .utils.spatial import RectGrid
+from .utils.graphics_pool import graphics_pool
 import time
 import py5
+from collections import deque
 from typing import Callable
 
 font_loaded, font = False, None
 
-# global list of text_input elements to be used for the key event
+# global list of all text_input elements. Key events are only routed to the focused element of a sketch, see focus()
 text_inputs = []
 # global list of all existing elements. If they all belong to the same sketch you can run them all with
 # the global .run() function
 elements = []
 organizers = []
 
+# per sketch ui state like the hit index over the element bounds, see context()
+contexts = {}
+
 # the py5 sketch instance to be used by default. It can either be set through use_sketch(sketch) when using 
 # py5 class mode or be infered when using py5 module mode
 s = None
@@ -25,7 +32,10 @@ def remap(value, inFrom, inTo, outFrom, outTo):
 
 def use_sketch(sketch:py5.Sketch):
     """Set the default sketch to be used for subsequently created elements 
-    and hook the UI into the sketch's key_pressed for Text_Input elements.
+    and hook the UI into the sketch's key_pressed and key_released for Text_Input elements and into its mouse_pressed,
+    mouse_released and mouse_dragged, so no click is lost between two frames.
+    Shift+tab moving the focus to the previous Text_Input further needs a def key_released(key_event): function,
+    which use_sketch() also adds when missing. Without it tab only moves forward.
     Notably Text_Input elements will also require your class-mode sketch to eiter:
         - call use_sketch(self) within a Sketch class's def __init__(self): after super().__init__() or 
         - possess a def key_pressed(key_event): function. This can function can be empty i.e. - pass
@@ -51,21 +61,229 @@ def use_sketch(sketch:py5.Sketch):
         # this block will auto-add an empty key_pressed() function to the sketch instance to enable the hook.
         def _key_pressed(self, key_event): pass
         s.key_pressed = _key_pressed.__get__(s)
-    s._add_post_hook('key_pressed', 'key_reading_hook', forward_key)
+    for method in ['key_released', *mouse_hooks]:
+        if not hasattr(s, method):
+            # like key_pressed, the key_released and mouse hooks need the sketch to have these functions
+            def _event(self, event): pass
+            setattr(s, method, _event.__get__(s))
+    hook_sketch(s)
+
+def hook_sketch(sketch:py5.Sketch):
+    """hook the ui into the key and mouse events of the sketch"""
+    sketch._add_post_hook('key_pressed', 'key_reading_hook', forward_key)
+    sketch._add_post_hook('key_released', 'key_release_hook', release_key)
+    for method, hook in mouse_hooks.items():
+        sketch._add_post_hook(method, f'{method}_hook', hook)
+
+def queue_mouse(sketch:py5.Sketch, pressed:bool, wheel:int=None):
+    """queue a mouse event of the sketch, to be resolved in order at the start of the next ui update"""
+    context(sketch)['events'].append((sketch.frame_count, sketch.mouse_x, sketch.mouse_y, pressed, wheel))
+
+mouse_hooks = {'mouse_pressed':  lambda sketch: queue_mouse(sketch, True),
+               'mouse_released': lambda sketch: queue_mouse(sketch, False),
+               'mouse_dragged':  lambda sketch: queue_mouse(sketch, True)}
+
+def connect_mouse_wheel(wheel_event, sketch:py5.Sketch=None):
+    """A wheel event forwarding function to be used within your sketch's def mouse_wheel(), letting a hovered
+    Slider step its value. Example:
+
+    def mouse_wheel(e):
+        ui.connect_mouse_wheel(e)
+    """
+    sketch = sketch or s or py5.get_current_sketch()
+    queue_mouse(sketch, sketch.is_mouse_pressed, wheel_event.get_count())
 
 def forward_key(sketch:py5.Sketch):
-    global text_inputs
-    key, key_code = sketch.key, sketch.key_code
-    for text_input in text_inputs:
-        text_input.process_key(key, key_code)
-
-def run():
+    ui = context(sketch)
+    if sketch.key_code == 16:
+        # shift, held for a reversed tab traversal
+        ui['shift'] = True
+        return
+    # a held shift is only known while the key_released hook reports its release, without a key_released() function
+    # in the sketch shift would stay latched => tab then always moves forward
+    route_key(sketch, sketch.key, sketch.key_code, ui['shift'] and ui['releases'])
+
+def release_key(sketch:py5.Sketch):
+    ui = context(sketch)
+    ui['releases'] = True
+    if sketch.key_code == 16:
+        ui['shift'] = False
+
+def route_key(sketch:py5.Sketch, key, key_code, shift:bool=False):
+    """Hand a key press to the focused element of the sketch only, tab moves the focus to the next focusable
+    element and shift+tab to the previous one"""
+    ui = context(sketch)
+    if key == '\t' or key_code == 9:
+        focus_next(sketch, -1 if shift else 1)
+    elif ui['focused'] is not None:
+        ui['focused'].process_key(key, key_code)
+
+def focus(sketch:py5.Sketch, element=None):
+    """Give the keyboard focus of the sketch to element, or remove it with None. Only the elements losing and gaining
+    the focus are notified."""
+    ui = context(sketch)
+    previous = ui['focused']
+    if previous is element:
+        return
+    ui['focused'] = element
+    if previous is not None:
+        previous.focus_changed(False)
+    if element is not None:
+        element.focus_changed(True)
+
+def focus_next(sketch:py5.Sketch, step:int=1):
+    """move the focus step places along the focusable elements of the sketch in their order of creation"""
+    ui = context(sketch)
+    order = ui['focusable']
+    if not order:
+        return
+    current = ui['focused']
+    if current is not None and current.focus_index is not None:
+        focus(sketch, order[(current.focus_index + step) % len(order)])
+    else:
+        focus(sketch, order[0] if step > 0 else order[-1])
+
+def context(sketch:py5.Sketch) -> dict:
+    """The ui state shared by all elements of a sketch: a grid index over the element bounds and the last resolved
+    mouse state with the hovered and pressed element"""
+    if sketch not in contexts:
+        contexts[sketch] = {'sketch': sketch, 'index': RectGrid(), 'mouse': None, 'moved': False,
+                            # (frame_count, x, y, pressed, wheel) of the mouse events since the last update
+                            'events': deque(maxlen=256),
+                            'hovered': None, 'pressed': None,
+                            # the single element receiving key presses and all elements tab can focus, see focus()
+                            'focused': None, 'focusable': [], 'shift': False, 'releases': False,
+                            # the retained ui layer and the regions to clear in it, see compose()
+                            'layer': None, 'damage': [], 'rendered': None}
+    return contexts[sketch]
+
+def resolve_mouse(sketch:py5.Sketch) -> dict:
+    """Resolve the queued mouse events of the sketch in order, followed by its current mouse state. A press and
+    release between two frames so still clicks an element."""
+    ui = context(sketch)
+    events = ui['events']
+    while events:
+        frame, *event = events.popleft()
+        if frame >= sketch.frame_count - 1:
+            # events from before the previous frame were queued while the ui wasn't run => dropped instead of
+            # firing all at once
+            apply_mouse(ui, *event)
+    apply_mouse(ui, sketch.mouse_x, sketch.mouse_y, sketch.is_mouse_pressed)
+    return ui
+
+def is_shown(element) -> bool:
+    """whether the element was updated in this or the previous frame. Elements that aren't run can't be clicked."""
+    return element.shown is not None and element.shown >= element.s.frame_count - 1
+
+def apply_mouse(ui:dict, x, y, pressed:bool, wheel:int=None):
+    """Resolve which element is hovered and pressed with a single index query, only when the mouse moved, its button
+    changed or an element moved since the last call. Only the elements whose state changed are notified."""
+    mouse = (x, y, pressed)
+    if mouse == ui['mouse'] and not ui['moved'] and wheel is None:
+        return
+    was_pressed = ui['mouse'] is not None and ui['mouse'][2]
+    ui['mouse'], ui['moved'] = mouse, False
+
+    hovered = ui['index'].at(mouse[0], mouse[1], where=is_shown)
+    if hovered is not ui['hovered']:
+        previous, ui['hovered'] = ui['hovered'], hovered
+        if previous is not None:
+            previous.hover_changed(False)
+        if hovered is not None:
+            hovered.hover_changed(True)
+
+    if mouse[2] and not was_pressed:
+        # a new press => the element under the mouse takes the press and the focus
+        ui['pressed'] = hovered
+        focus(ui['sketch'], hovered)
+        if hovered is not None:
+            hovered.press_changed(True)
+    elif not mouse[2] and was_pressed:
+        previous, ui['pressed'] = ui['pressed'], None
+        if previous is not None:
+            previous.press_changed(False)
+
+    if wheel is not None and hovered is not None:
+        hovered.wheel_moved(wheel)
+
+def run(retained:bool=False, max_hz:float=None):
+    """Run all created elements.
+
+    With retained=True the elements are instead drawn into a cached ui layer per sketch, in which only the elements
+    that changed (see Element.dirty) are drawn again. The layer is then drawn onto the sketch with a single image()
+    call, so a static panel of many elements costs about as much as one image per frame.
+    max_hz limits how often the ui layer is drawn again, i.e. max_hz=30 for a sketch running at frame_rate(300). The
+    mouse and keyboard are still read every frame, in between the last drawn layer is shown. Implies retained=True."""
     global elements
+    if retained or max_hz is not None:
+        groups = {}
+        for e in elements:
+            groups.setdefault(e.s, []).append(e)
+        for sketch, group in groups.items():
+            compose(sketch, group, [o for o in organizers if o.s is sketch], max_hz)
+        return
+    for ui in contexts.values():
+        if ui['layer'] is not None:
+            # drawn directly again => a retained layer would be outdated, the next retained run starts a new one
+            graphics_pool(ui['sketch']).release(ui['layer'])
+            ui['layer'], ui['damage'] = None, []
     for e in elements:
         e.run()
     for o in organizers:
         o.draw()
 
+def compose(sketch:py5.Sketch, group:list, frames:list=(), max_hz:float=None):
+    """Update the elements of a sketch, redraw only the regions of the changed ones into the sketch's ui layer
+    and draw the layer onto the sketch. With max_hz the layer is drawn again at most max_hz times per second."""
+    ui = context(sketch)
+    for e in group:
+        e.update()
+
+    layer, regions = ui['layer'], []
+    now = time.perf_counter()
+    if (max_hz is not None and layer is not None and ui['rendered'] is not None and now - ui['rendered'] < 1 / max_hz
+        and (layer.width, layer.height) == (sketch.width, sketch.height)):
+        # too early to draw again => the changed elements stay dirty until the next refresh
+        sketch.image(layer, 0, 0)
+        return
+    ui['rendered'] = now
+    if layer is None or (layer.width, layer.height) != (sketch.width, sketch.height):
+        if layer is not None:
+            graphics_pool(sketch).release(layer)
+        layer = ui['layer'] = graphics_pool(sketch).acquire(sketch.width, sketch.height)
+        # a new layer => everything has to be drawn
+        redraw, regions = group, None
+    else:
+        # 1px beyond the bounds for antialiased edges
+        regions = [(x-1, y-1, w+2, h+2) for x, y, w, h in ui['damage'] + [(e.x, e.y, e.w, e.h) for e in group if e.dirty]]
+        redraw = {e for e in group if e.dirty}
+        for region in regions:
+            # clean neighbours reaching into a cleared region are cleared and drawn again as well
+            for e in ui['index'].overlapping(*region):
+                if e not in redraw:
+                    redraw.add(e)
+                    regions.append((e.x, e.y, e.w, e.h))
+        redraw = [e for e in group if e in redraw]
+    ui['damage'] = []
+
+    if regions is None or regions:
+        layer.begin_draw()
+        if regions is None:
+            layer.clear()
+        else:
+            layer.blend_mode(layer.REPLACE)
+            layer.no_stroke();  layer.fill(0, 0);   layer.rect_mode(layer.CORNER)
+            for x, y, w, h in regions:
+                layer.rect(x, y, w, h)
+            layer.blend_mode(layer.BLEND)
+        for e in redraw:
+            e.draw(layer)
+            e.dirty = False
+        for o in frames:
+            o.draw(layer)
+        layer.end_draw()
+    sketch.image(layer, 0, 0)
+
 class Element:
     def __init__(self, sketch:py5.Sketch=None, pos:tuple=(0,0), label:str='', w:int=30, h:int=30):
         """A general ui element parent class
@@ -86,11 +304,20 @@ class Element:
         if sketch is None:
             if s is None:
                 self.s = py5.get_current_sketch()
-                self.s._add_post_hook('key_pressed', 'key_reading_hook', forward_key)
+                hook_sketch(self.s)
             else:
                 self.s = s
         else:
             self.s = sketch
+        # the hit index and mouse state shared with the other elements of the sketch
+        self.ui = context(self.s)
+        self.hovered, self.pressed = False, False
+        # the frame_count of the last update, only elements run in the current or previous frame react to the mouse
+        self.shown = None
+        # the position among the elements of the sketch that tab can focus, None if tab skips the element
+        self.focus_index = None
+        # whether the element looks different from when it was last drawn, see run(retained=True)
+        self.dirty = True
         
         self.label = label
         self.h = h;     self.w = w
@@ -109,6 +336,8 @@ class Element:
             font_loaded = True
         self.font = font
         font_loaded = True
+        # cached text measurements of the element font, see text_metrics()
+        self.metrics = text_metrics(self.s, self.font)
 
         elements.append(self)
     
@@ -117,28 +346,86 @@ class Element:
         self.x = x
         self.y = y
         self.center = (self.x + self.w/2, self.y + self.h/2)
+        self.update_bounds()
 
     def update_width(self, w=30):
         self.w = w
-        self.center = (self.x + self.w/2, self.y + self.h/2)    
-    
+        self.center = (self.x + self.w/2, self.y + self.h/2)
+        self.update_bounds()
+
+    def update_bounds(self):
+        """register the current bounds in the sketch's hit index"""
+        previous = self.ui['index'].bounds.get(self)
+        if previous is not None and previous != (self.x, self.y, self.w, self.h) and self.ui['layer'] is not None:
+            # the area the element left has to be cleared in the retained ui layer
+            self.ui['damage'].append(previous)
+        self.ui['index'].move(self, self.x, self.y, self.w, self.h)
+        self.dirty = True
+        # the element might have moved under or away from the mouse => resolve it again
+        self.ui['moved'] = True
+
     def mouse_in(self):
         return True if self.s.mouse_x > self.x and self.s.mouse_x < self.x+self.w and \
                self.s.mouse_y > self.y and self.s.mouse_y < self.y+self.h else False
+
+    def resolve_mouse(self):
+        """update the hovered and pressed state of the sketch's elements if the mouse changed"""
+        self.shown = self.s.frame_count
+        resolve_mouse(self.s)
+
+    def hover_changed(self, hovered:bool):
+        self.hovered = hovered
+        self.dirty = True
+
+    def press_changed(self, pressed:bool):
+        self.pressed = pressed
+        self.dirty = True
+
+    def focus_changed(self, focused:bool):
+        pass
+
+    def process_key(self, key_char, key_code):
+        """handle a key press while the element is focused"""
+        pass
+
+    def wheel_moved(self, count:int):
+        pass
+
+    def run(self):
+        """update the element and draw it onto its sketch"""
+        self.update()
+        self.draw(self.s)
+        self.dirty = False
+
+    def update(self):
+        """react to the mouse and keyboard without drawing. Changes to the looks of the element set .dirty"""
+        self.resolve_mouse()
+
+    def draw(self, p):
+        """draw the element onto p, the sketch or a graphics layer"""
+        pass
+
+    def set_label(self, label):
+        self.label_ = label
+        self.dirty = True
+
+    label:str = property(fget=lambda self : self.label_, fset=set_label)
                
-    def set_style(self, highlight=False, pressed=False, align_left=False):
-        self.s.stroke(*self.pressed_stroke) if pressed else self.s.stroke(*self.stroke)
-        self.s.fill(*self.highlight_fill) if highlight else self.s.fill(0)
-        self.s.stroke_weight(self.stroke_weight)
-        self.s.text_font(self.font)
-        self.s.rect_mode(self.s.CENTER)
+    def set_style(self, highlight=False, pressed=False, align_left=False, p=None):
+        p = self.s if p is None else p
+        p.stroke(*self.pressed_stroke) if pressed else p.stroke(*self.stroke)
+        p.fill(*self.highlight_fill) if highlight else p.fill(0)
+        p.stroke_weight(self.stroke_weight)
+        p.text_font(self.font)
+        p.rect_mode(p.CENTER)
         if align_left:
-            self.s.text_align(self.s.LEFT, self.s.CENTER)
+            p.text_align(p.LEFT, p.CENTER)
         else:
-            self.s.text_align(self.s.CENTER, self.s.CENTER)
+            p.text_align(p.CENTER, p.CENTER)
         
-    def set_text_style(self):
-        self.s.fill(*self.text_fill);   self.s.stroke(*self.text_stroke)
+    def set_text_style(self, p=None):
+        p = self.s if p is None else p
+        p.fill(*self.text_fill);   p.stroke(*self.text_stroke)
 
 class Button(Element):
     def __init__(self, on_click:Callable=None, func_args:list=None, func_kwargs:dict=None, **kwargs):
@@ -154,29 +441,23 @@ class Button(Element):
         
         self.func_args, self.func_kwargs = func_args, func_kwargs
         super().__init__(**kwargs)
-        self.update_width(self.s.text_width(self.label) + 30)
+        self.update_width(self.metrics.width(self.label) + 30)
 
         self.on_click = on_click
-        self.prev_mouse_pressed = False
-    
-    def run(self):
-        mouse_in = self.mouse_in()
-        
-        pressed = False
-        if mouse_in and self.s.is_mouse_pressed:
-            pressed = True
-            if not self.prev_mouse_pressed:
-                self.on_click( *(self.func_args if self.func_args else ()),
-                                  **(self.func_kwargs if self.func_kwargs else {}))
-        
-        with self.s.push_style():
-            self.set_style(highlight=mouse_in, pressed=pressed)
-            self.s.rect(self.center[0], self.center[1], 
-                        self.w-self.stroke_weight, self.h-self.stroke_weight)
-            self.set_text_style()
-            self.s.text(self.label, self.center[0], self.center[1])
-        
-        self.prev_mouse_pressed = self.s.is_mouse_pressed
+
+    def press_changed(self, pressed:bool):
+        super().press_changed(pressed)
+        if pressed and self.on_click is not None:
+            self.on_click( *(self.func_args if self.func_args else ()),
+                              **(self.func_kwargs if self.func_kwargs else {}))
+
+    def draw(self, p):
+        with p.push_style():
+            self.set_style(highlight=self.hovered, pressed=self.pressed and self.hovered, p=p)
+            p.rect(self.center[0], self.center[1], 
+                   self.w-self.stroke_weight, self.h-self.stroke_weight)
+            self.set_text_style(p)
+            p.text(self.label, self.center[0], self.center[1])
 
 class Slider(Element):
     def __init__(self, min:float=0.0, max:float=1.0, value:float=None, width:int=150,
@@ -219,49 +500,68 @@ class Slider(Element):
         self.label = label
         if self.label is not None:
             self.h = self.h *1.6
-            while self.s.text_width(self.label) >= self.w - 1.5*self.knob_height:
-                self.label = self.label[:-1]
+            self.label = self.metrics.truncate(self.label, self.w - 1.5*self.knob_height)
+            self.update_bounds()
         self.step_decimals = step_decimals
 
-    def run(self):
-        with self.s.push_style():
-            if(not self.isDragged and self.s.is_mouse_pressed):
-                if(self.s.mouse_x >= self.x and self.s.mouse_x <= self.x + self.w and
-                self.s.mouse_y >= self.y-10 and self.s.mouse_y <= self.y + 24):
-                    self.isDragged = True
-            if(self.isDragged and not self.s.is_mouse_pressed):
-                self.isDragged = False
-                if self.on_change is not None:
-                    self.on_change(self.value_, *(self.func_args if self.func_args else ()),
-                                               **(self.func_kwargs if self.func_kwargs else {}))
-            if(self.isDragged):
-                newVal = self.s.remap(self.s.mouse_x, self.x, self.x + self.w,
-                                self.min, self.max)
-                self.value_ = float(self.s.constrain(newVal, self.min, self.max))
-                if not self.step_decimals is None:
-                    self.value_ = round(self.value_, self.step_decimals)
-                if self.on_change_while_dragged and self.on_change is not None:
-                    self.on_change(self.value_, *(self.func_args if self.func_args else ()),
-                                               **(self.func_kwargs if self.func_kwargs else {}))
-
-            self.set_style(highlight=self.mouse_in(), pressed=self.isDragged)
+    def press_changed(self, pressed:bool):
+        super().press_changed(pressed)
+        # the mouse position of the press or release event, which might lie between two frames
+        mouse_x = self.ui['mouse'][0]
+        if pressed:
+            self.isDragged = True
+            self.drag_to(mouse_x)
+        elif self.isDragged:
+            self.drag_to(mouse_x)
+            self.isDragged = False
+            if self.on_change is not None:
+                self.on_change(self.value_, *(self.func_args if self.func_args else ()),
+                                           **(self.func_kwargs if self.func_kwargs else {}))
+
+    def wheel_moved(self, count:int):
+        # one step per wheel notch, or a hundredth of the range without step_decimals
+        step = (self.max - self.min) / 100 if self.step_decimals is None else 10**-self.step_decimals
+        self.update_value(self.s.constrain(self.value_ - count*step, self.min, self.max))
+        if self.on_change is not None:
+            self.on_change(self.value_, *(self.func_args if self.func_args else ()),
+                                       **(self.func_kwargs if self.func_kwargs else {}))
+
+    def drag_to(self, mouse_x):
+        newVal = self.s.remap(mouse_x, self.x, self.x + self.w,
+                        self.min, self.max)
+        self.update_value(self.s.constrain(newVal, self.min, self.max))
+        if self.on_change_while_dragged and self.on_change is not None:
+            self.on_change(self.value_, *(self.func_args if self.func_args else ()),
+                                       **(self.func_kwargs if self.func_kwargs else {}))
+
+    def update(self):
+        self.resolve_mouse()
+        if(self.isDragged):
+            self.drag_to(self.s.mouse_x)
+
+    def draw(self, p):
+        with p.push_style():
+            self.set_style(highlight=self.hovered, pressed=self.isDragged, p=p)
             # subtract half heights from both edges that only the knob will cover when at the edge
-            self.s.rect(self.center[0], self.center[1], self.w-self.knob_height, self.h, 8)
+            p.rect(self.center[0], self.center[1], self.w-self.knob_height, self.h, 8)
             elliPos = self.s.remap(self.value_, self.min, self.max, 
                                    self.x+self.knob_height/2, self.x+self.w-self.knob_height/2)
-            self.s.ellipse(elliPos, self.y + self.h - self.knob_height/2, self.knob_height, self.knob_height)
+            p.ellipse(elliPos, self.y + self.h - self.knob_height/2, self.knob_height, self.knob_height)
 
-            self.set_text_style()
-            self.s.text(f'{self.value_:.5g}', self.center[0], self.y + self.h - self.knob_height/2)
+            self.set_text_style(p)
+            p.text(f'{self.value_:.5g}', self.center[0], self.y + self.h - self.knob_height/2)
             if self.label is not None:
-                self.s.fill(192)
-                self.s.text_align(self.s.RIGHT, self.s.TOP)
-                self.s.text(self.label, self.x+self.w-15, self.y+2)
+                p.fill(192)
+                p.text_align(p.RIGHT, p.TOP)
+                p.text(self.label, self.x+self.w-15, self.y+2)
 
     def update_value(self, value):
-        self.value_ = float(value)
+        value = float(value)
         if not self.step_decimals is None:
-            self.value_ = round(self.value_, self.step_decimals)
+            value = round(value, self.step_decimals)
+        if value != self.value_:
+            self.value_ = value
+            self.dirty = True
 
     value:float = property(fget=lambda self : self.value_, fset=update_value)
 
@@ -292,7 +592,6 @@ class Text_Input(Element):
         """
         
         super().__init__(label=label, **kwargs, w=w)
-        self.active = False
         self.input = str(default)
         self.execute_func, self.func_args, self.func_kwargs = on_enter, func_args, func_kwargs
         
@@ -300,43 +599,62 @@ class Text_Input(Element):
         self.use_hook = use_hook
         self.prev_key_pressed = False
         self.cursor = len(self.input)
+        # whether the blinking cursor is currently shown
+        self.cursor_shown = False
         
         global text_inputs
         text_inputs.append(self)
+        # tab moves through the text inputs of a sketch in their order of creation
+        self.focus_index = len(self.ui['focusable'])
+        self.ui['focusable'].append(self)
+
+    def focus_changed(self, focused:bool):
+        # clicking the input or tabbing to it activates it, clicking anywhere else deactivates it
+        self.dirty = True
+        # with use_hook=False the key that moved the focus here must not be read again
+        self.prev_key_pressed = self.s.is_key_pressed
 
-    def run(self):
-        mouse_in = self.mouse_in()
-        pressed = False
-        if self.s.is_mouse_pressed:
-            if mouse_in: 
-                pressed = True
-                self.active = True
-            else:
-                self.active = False
+    def set_active(self, active:bool):
+        if active:
+            focus(self.s, self)
+        elif self.active:
+            focus(self.s, None)
+
+    # only the single focused element of a sketch is active
+    active:bool = property(fget=lambda self : self.ui['focused'] is self, fset=set_active)
+
+    def update(self):
+        self.resolve_mouse()
 
         if not self.use_hook:
             self.read_sketch()
 
-        with self.s.push_style():
-            self.set_style(highlight=mouse_in, pressed=pressed, align_left=True)
-            self.s.rect(self.center[0], self.center[1], 
-                        self.w-self.stroke_weight, self.h-self.stroke_weight)
-            self.set_text_style()
-            self.s.rect_mode(self.s.CORNER)
-            self.s.text(self.input, self.x+7, self.y, self.w-15, self.h)
-
-            if self.active and time.time() % 1.5 > 0.75:
-                cursor_offset = self.s.text_width(self.input[0:self.cursor])
-                text_height = self.s.text_ascent() + self.s.text_descent()
-                self.s.line(self.x+8+cursor_offset, self.center[1] - text_height/2,
-                            self.x+8+cursor_offset, self.center[1] + text_height/2)
+        cursor_shown = self.active and time.time() % 1.5 > 0.75
+        if cursor_shown != self.cursor_shown:
+            self.cursor_shown = cursor_shown
+            self.dirty = True
+
+    def draw(self, p):
+        with p.push_style():
+            self.set_style(highlight=self.hovered, pressed=self.pressed and self.hovered, align_left=True, p=p)
+            p.rect(self.center[0], self.center[1], 
+                   self.w-self.stroke_weight, self.h-self.stroke_weight)
+            self.set_text_style(p)
+            p.rect_mode(p.CORNER)
+            p.text(self.input, self.x+7, self.y, self.w-15, self.h)
+
+            if self.cursor_shown:
+                cursor_offset = self.metrics.width(self.input[0:self.cursor])
+                text_height = self.metrics.height
+                p.line(self.x+8+cursor_offset, self.center[1] - text_height/2,
+                       self.x+8+cursor_offset, self.center[1] + text_height/2)
             
             if self.input == '':
-                self.s.fill(127)
+                p.fill(127)
             else:
-                self.s.fill(64)
-            self.s.text_align(self.s.RIGHT)
-            self.s.text(self.label, self.x+self.w-7, self.center[1])
+                p.fill(64)
+            p.text_align(p.RIGHT)
+            p.text(self.label, self.x+self.w-7, self.center[1])
 
     def read_sketch(self):
         """Alternative to approach to the callback to be run within the frame loop. This doesn't require a callback
@@ -345,11 +663,12 @@ class Text_Input(Element):
         """
         if self.active:
             if not self.prev_key_pressed and self.s.is_key_pressed:
-                self.process_key(self.s.key, self.s.key_code)
+                route_key(self.s, self.s.key, self.s.key_code)
         self.prev_key_pressed = self.s.is_key_pressed
 
     def process_key(self, key_char, key_code):
         if self.active:
+            self.dirty = True
             if key_char == '\n':
                 if not self.execute_func is None:
                     self.execute_func(self.input, *(self.func_args if self.func_args else ()),
@@ -372,25 +691,27 @@ class Text_Input(Element):
                     self.input = self.input[0:self.cursor] + key_char + self.input[self.cursor:]
                     self.cursor = min(self.cursor + 1, len(self.input))
 
-    def update_value(self, value):   self.input = str(value)
+    def update_value(self, value):
+        self.input = str(value)
+        self.cursor = min(self.cursor, len(self.input))
+        self.dirty = True
     value:str = property(fget=lambda self : self.input, fset=update_value)
 
-def connect_keyboard(key_event):
+def connect_keyboard(key_event, sketch:py5.Sketch=None):
     """Alternative to use_sketch() that can be called from a sketch's def key_pressed() for forwarding key presses
-    to Text_Input elements.
+    to the focused Text_Input element.
 
     # Example:
     def key_pressed(e):
-        ui.connect_keyboard_ui(e)
+        ui.connect_keyboard(e)
     """
 
     # An alternatives to this approach could be checking p.key within the input's .run() which makes it loose keys
     # that are typed faster than its framerate, or using from pynput.keyboard import Key, Listener which seems
     # to come with a small performance impact (~300 hz in a 2700hz to 2400hz example) The pynput approach
     # should still be implemented as an alternative for less performance critical applications
-    global text_inputs
-    for text_input in text_inputs:
-        text_input.process_key(key_event.key, key_event.key_code)
+    sketch = sketch or s or py5.get_current_sketch()
+    route_key(sketch, key_event.key, key_event.key_code, key_event.is_shift_down())
 
 class Toggle(Element):
     def __init__(self, value:bool=False, labels:str|list[str,str]='', 
@@ -412,50 +733,50 @@ class Toggle(Element):
         super().__init__(**kwargs)
 
         if type(labels) == str:
-            w = self.s.text_width(labels) + 30
+            w = self.metrics.width(labels) + 30
             self.single_label = True
         else:
-            w = max(self.s.text_width(labels[0]), self.s.text_width(labels[1])) + 30
+            w = max(self.metrics.widths(labels[:2])) + 30
             self.single_label = False
         self.update_width(w)
         self.on_click, self.func_args, self.func_kwargs = on_click, func_args, func_kwargs
-        self.prev_mouse_pressed = False
 
         self.labels = labels
         self.value = value
 
-    def run(self):
-        mouse_in = self.mouse_in()
-        
-        pressed = False
-        if mouse_in and self.s.is_mouse_pressed:
-            pressed = True
-            if not self.prev_mouse_pressed:
-                self.value = not self.value
-                if not self.on_click is None:
-                    self.on_click(self.value, *(self.func_args if self.func_args else ()),
-                                            **(self.func_kwargs if self.func_kwargs else {}))
-
-        with self.s.push_style():
-            self.set_style(highlight=mouse_in, pressed=pressed)
+    def press_changed(self, pressed:bool):
+        super().press_changed(pressed)
+        if pressed:
+            self.value = not self.value
+            if not self.on_click is None:
+                self.on_click(self.value, *(self.func_args if self.func_args else ()),
+                                        **(self.func_kwargs if self.func_kwargs else {}))
+
+    def draw(self, p):
+        with p.push_style():
+            self.set_style(highlight=self.hovered, pressed=self.pressed and self.hovered, p=p)
             if self.value:
-                self.s.stroke(63,127,127)
+                p.stroke(63,127,127)
             else:
-                self.s.stroke(127,63,63)
-            self.s.rect(self.center[0], self.center[1], 
-                        self.w-self.stroke_weight, self.h-self.stroke_weight)
-            self.set_text_style()
+                p.stroke(127,63,63)
+            p.rect(self.center[0], self.center[1], 
+                   self.w-self.stroke_weight, self.h-self.stroke_weight)
+            self.set_text_style(p)
             if self.single_label:
-                self.s.fill(127,192,192) if self.value else self.s.fill(192,127,127)
-                self.s.text(self.labels, self.center[0], self.center[1])
+                p.fill(127,192,192) if self.value else p.fill(192,127,127)
+                p.text(self.labels, self.center[0], self.center[1])
             elif self.value:
-                self.s.fill(127,192,192)
-                self.s.text(self.labels[1], self.center[0], self.center[1])
+                p.fill(127,192,192)
+                p.text(self.labels[1], self.center[0], self.center[1])
             else:
-                self.s.fill(192,127,127)
-                self.s.text(self.labels[0], self.center[0], self.center[1])
-        
-        self.prev_mouse_pressed = self.s.is_mouse_pressed
+                p.fill(192,127,127)
+                p.text(self.labels[0], self.center[0], self.center[1])
+
+    def update_value(self, value:bool):
+        self.value_ = value
+        self.dirty = True
+
+    value:bool = property(fget=lambda self : self.value_, fset=update_value)
 
 class Text(Element):
     # TODO
@@ -473,23 +794,6 @@ class Minimal_Base(Element):
 class Selector(Element):
     pass
 
-def connect_keyboard(key_event):
-    """A key_event forwarding function to be used within your sketch's def key_pressed().
-    This allows text_inputs to read the keyboard.
-    Example:
-
-    def key_pressed(e):
-        ui.connect_keyboard_ui(e)
-    """
-
-    # An alternatives to this approach could be checking p.key within the input's .run() which makes it loose keys
-    # that are typed faster than its framerate, or using from pynput.keyboard import Key, Listener which seems
-    # to come with a small performance impact (~300 hz in a 2700hz to 2400hz example) The pynput approach
-    # should still be implemented as an alternative for less performance critical applications
-    global text_inputs
-    for text_input in text_inputs:
-        text_input.process_key(key_event)
-
 class Organizer:
     def __init__(self, sketch:py5.Sketch=None, pos:tuple[int,int]=(0,0), max_w=None, max_h=None):
         # TODO: add invisible borders argument, consider skip first spacer argument
@@ -497,12 +801,13 @@ class Organizer:
         if sketch is None:
             if s is None:
                 self.s = py5.get_current_sketch()
-                self.s._add_post_hook('key_pressed', 'key_reading_hook', forward_key)
+                hook_sketch(self.s)
             else:
                 self.s = s
         else:
             self.s = sketch
 
+        self.ui = context(self.s)
         self.spacer_height = 10
         self.spacer_width = 10
         self.elements = []
@@ -515,6 +820,9 @@ class Organizer:
         organizers.append(self)
 
     def update_xy(self, x=None, y=None):
+        if self.w is not None and self.h is not None and (x, y) != (self.x, self.y) and self.ui['layer'] is not None:
+            # the frame left its area in the retained ui layer
+            self.ui['damage'].append((self.x, self.y, self.w, self.h))
         self.x = x
         self.y = y
 
@@ -523,10 +831,11 @@ class Organizer:
             element.run()
         self.draw()
 
-    def draw(self):
-        with self.s.push_style():
-            self.s.stroke(127,);      self.s.no_fill();     self.s.stroke_weight(1)
-            self.s.rect(self.x, self.y, self.w, self.h)
+    def draw(self, p=None):
+        p = self.s if p is None else p
+        with p.push_style():
+            p.stroke(127,);      p.no_fill();     p.stroke_weight(1)
+            p.rect(self.x, self.y, self.w, self.h)
 
     def add(self, element:Element):
         self.elements.append(element)
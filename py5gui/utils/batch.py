@@ -0,0 +1,180 @@
+import numpy as np
+
+# Every py5 call crosses the python/java bridge. The functions in here prepare whole series as numpy arrays,
+# so they can be handed to py5 with a single call instead of one call per data point.
+
+def color_to_argb(color) -> int:
+    """Pack a py5 style color tuple - (gray,), (gray, alpha), (r, g, b) or (r, g, b, a) - into a signed 32 bit
+    ARGB integer as used by processing."""
+    return int(colors_to_argb([color])[0])
+
+def colors_to_argb(colors) -> np.ndarray:
+    """Pack a list (or 2D array) of py5 style color tuples into an int32 array of ARGB colors, one per entry."""
+    try:
+        cols = np.asarray(colors, dtype=np.int64)
+    except ValueError:
+        # mixed color formats i.e. [(255,), (255, 0, 0)] => bring every color into (r, g, b, a) first
+        cols = np.array([expand_color(c) for c in colors], dtype=np.int64)
+    if cols.ndim == 1:
+        cols = cols[:, None]
+    cols = np.clip(cols, 0, 255)
+    channels = cols.shape[1]
+    if channels == 1:
+        r = g = b = cols[:, 0];     a = 255
+    elif channels == 2:
+        r = g = b = cols[:, 0];     a = cols[:, 1]
+    elif channels == 3:
+        r, g, b = cols[:, 0], cols[:, 1], cols[:, 2];   a = 255
+    else:
+        r, g, b, a = cols[:, 0], cols[:, 1], cols[:, 2], cols[:, 3]
+    argb = (a << 24) | (r << 16) | (g << 8) | b
+    # java ints are signed => wrap the unsigned 32 bit values
+    return argb.astype(np.uint32).view(np.int32)
+
+def expand_color(color) -> tuple:
+    """Bring a py5 style color tuple into the (r, g, b, a) form"""
+    if len(color) == 1:
+        return (color[0], color[0], color[0], 255)
+    if len(color) == 2:
+        return (color[0], color[0], color[0], color[1])
+    if len(color) == 3:
+        return (*color, 255)
+    return tuple(color)
+
+def segments(coords:np.ndarray) -> np.ndarray:
+    """Turn a polyline of n (x, y) coordinates into the 2*(n-1) vertices of the individual line segments
+    [p0, p1, p1, p2, p2, p3, ...] as used by shapes of the LINES kind"""
+    verts = np.empty((2*(coords.shape[0]-1), 2), dtype=np.float64)
+    verts[0::2] = coords[:-1]
+    verts[1::2] = coords[1:]
+    return verts
+
+def quads(x0, y0, x1, y1) -> np.ndarray:
+    """The 6*n vertices of n axis aligned rectangles from corners (x0, y0) to (x1, y1), as two triangles each for
+    shapes of the TRIANGLES kind"""
+    x0, y0, x1, y1 = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (x0, y0, x1, y1)))
+    verts = np.empty((x0.shape[0], 6, 2), dtype=np.float64)
+    verts[:, [0, 3, 5], 0] = x0[:, None];   verts[:, [1, 2, 4], 0] = x1[:, None]
+    verts[:, [0, 1, 3], 1] = y0[:, None];   verts[:, [2, 4, 5], 1] = y1[:, None]
+    return verts.reshape(-1, 2)
+
+def is_gl(p) -> bool:
+    """whether p, a sketch or a graphics, draws with an OpenGL renderer (P2D or P3D). Only those can color the
+    vertices of a shape individually and texture shapes, the default JAVA2D renderer can't."""
+    g = p.get_graphics() if hasattr(p, 'get_graphics') else p
+    try:
+        return bool(g._instance.isGL())
+    except AttributeError:
+        return False
+
+def draw_vertices(p, kind, vertices:np.ndarray, argb:np.ndarray=None, stroke=True, stroke_weight=1):
+    """Draw all vertices as a single shape of the provided kind, i.e. p.LINES or p.TRIANGLES. kind=None draws an
+    open polyline. Without argb the shape will use the current fill and stroke. argb can provide an ARGB color for
+    every vertex which will be applied to the stroke, or with stroke=False to the fill of the shape.
+    On a JAVA2D p the vertices are instead drawn as one shape per color, every line or triangle in the color of
+    its first vertex."""
+    if vertices.shape[0] == 0:
+        return
+    if argb is not None and not is_gl(p):
+        if kind is None:
+            vertices, argb, kind = segments(vertices), np.repeat(argb[:-1], 2), p.LINES
+        step = 2 if kind == p.LINES else 3
+        uniques, inverse = np.unique(argb[::step], return_inverse=True)
+        for i, col in enumerate(uniques):
+            p.stroke(int(col)) if stroke else p.fill(int(col))
+            p.begin_shape(kind)
+            p.vertices(vertices[np.repeat(inverse == i, step)])
+            p.end_shape()
+        return
+    if argb is None:
+        if kind is None:
+            p.begin_shape()
+        else:
+            p.begin_shape(kind)
+        p.vertices(vertices)
+        p.end_shape()
+        return
+    # per vertex colors => build a shape that can receive all colors at once instead of a p.stroke() per vertex
+    shape = p.create_shape()
+    if kind is None:
+        shape.begin_shape()
+    else:
+        shape.begin_shape(kind)
+    if stroke:
+        shape.no_fill()
+        shape.stroke_weight(stroke_weight)
+    else:
+        shape.no_stroke()
+    shape.vertices(vertices)
+    shape.end_shape()
+    if stroke:
+        shape.set_strokes(argb)
+    else:
+        shape.set_fills(argb)
+    p.shape(shape)
+
+#-------------------------SCATTER MARKERS-------------------------
+
+def circle_template(segments=12) -> np.ndarray:
+    """triangle fan of a unit diameter circle as a list of triangle vertices"""
+    angles = np.linspace(0, 2*np.pi, segments + 1)
+    rim = np.column_stack((np.cos(angles), np.sin(angles))) * 0.5
+    verts = np.zeros((segments, 3, 2))
+    verts[:, 1] = rim[:-1]
+    verts[:, 2] = rim[1:]
+    return verts.reshape(-1, 2)
+
+# The geometry of every marker is only built once. A marker is a shape kind, its vertices relative to the data
+# point and whether the vertices scale with the scatter's diameter= (circles and squares) or use fixed pixel sizes.
+MARKERS = {
+    'circle':   ('triangles', circle_template(), True),
+    'square':   ('triangles', np.array([[-.5, -.5], [.5, -.5], [.5, .5],
+                                        [-.5, -.5], [.5, .5], [-.5, .5]]), True),
+    'triangle': ('triangles', np.array([[-3., 3.], [0., -3.], [3., 3.]]), False),
+    'line':     ('lines', np.array([[0., -5.], [0., 5.]]), False),
+    'cross':    ('lines', np.array([[-3., -3.], [3., 3.], [-3., 3.], [3., -3.]]), False),
+}
+
+def stamp(template:np.ndarray, xcoords, ycoords, size=None) -> np.ndarray:
+    """Place a copy of the template vertices at every (x, y) coordinate. size can be a single value or an array
+    with a scale for every point. Returns all vertices as one (n * template vertices, 2) array."""
+    centers = np.column_stack((xcoords, ycoords))
+    if size is None:
+        verts = centers[:, None, :] + template[None, :, :]
+    else:
+        size = np.asarray(size, dtype=np.float64)
+        scales = size[:, None, None] if size.ndim == 1 else size
+        verts = centers[:, None, :] + template[None, :, :] * scales
+    return verts.reshape(-1, 2)
+
+def stamp_uvs(xcoords, ycoords, w, h) -> np.ndarray:
+    """Two textured triangles of size w, h centered on every point. Returns (x, y, u, v) vertices with normalized
+    texture coordinates to stamp an image onto all points with one shape."""
+    quad = np.array([[-.5, -.5, 0, 0], [.5, -.5, 1, 0], [.5, .5, 1, 1],
+                     [-.5, -.5, 0, 0], [.5, .5, 1, 1], [-.5, .5, 0, 1]])
+    verts = np.repeat(quad[None, :, :], len(xcoords), axis=0)
+    verts[:, :, 0] = verts[:, :, 0] * w + np.asarray(xcoords)[:, None]
+    verts[:, :, 1] = verts[:, :, 1] * h + np.asarray(ycoords)[:, None]
+    return verts.reshape(-1, 4)
+
+# rendered character markers, one white glyph image per sketch, character and text size
+glyphs = {}
+
+def glyph(sketch, char:str, text_size=14):
+    """Render a text marker once into a white image that can be tinted and reused as a texture"""
+    key = (sketch, char, text_size)
+    if key not in glyphs:
+        with sketch.push_style():
+            sketch.text_size(text_size)
+            w = int(sketch.text_width(char)) + 2
+            h = int(sketch.text_ascent() + sketch.text_descent()) + 2
+        g = sketch.create_graphics(max(w, 1), max(h, 1))
+        g.begin_draw()
+        g.clear()
+        g.text_size(text_size)
+        g.fill(255);    g.no_stroke()
+        g.text_align(g.CENTER, g.CENTER)
+        g.text(char, w/2, h/2)
+        g.end_draw()
+        glyphs[key] = g
+    return glyphs[key]
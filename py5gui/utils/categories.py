@@ -0,0 +1,75 @@
+import numpy as np
+
+def is_categorical(values) -> bool:
+    """whether data holds category labels (strings) instead of numbers"""
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind in 'US':
+            return True
+        if values.dtype.kind != 'O':
+            return False
+    return len(values) > 0 and isinstance(values[0], str)
+
+class Categories:
+    """A table of category labels, each stored by an integer code - similar to a pandas Categorical.
+
+       Categorical data is kept as an array of codes into this table, so looking up the position of every data
+       point is a single numpy fancy index instead of a dict lookup per point. The table only grows by the new
+       labels of newly encoded data, new labels of every encoded batch are added in sorted order."""
+    def __init__(self):
+        self.labels = []
+        self.codes = {}
+        self.cached = (None, None)
+
+    def encode(self, values) -> np.ndarray:
+        """turn a sequence of labels into an int array of their codes, adding unseen labels to the table"""
+        values = np.asarray(values)
+        uniques, inverse = np.unique(values, return_inverse=True)
+        # only the few unique labels are looked up in python, the data points are mapped by numpy
+        lookup = np.empty(uniques.shape[0], dtype=np.int64)
+        for i, label in enumerate(uniques.tolist()):
+            if label not in self.codes:
+                self.codes[label] = len(self.labels)
+                self.labels.append(label)
+            lookup[i] = self.codes[label]
+        return lookup[inverse.ravel()]
+
+    def positions(self, start, end, order=None):
+        """Evenly spaced positions from start to end for the labels. The first label is placed at end, so with
+        y coordinates start=bottom, end=top the first label is on top.
+        Returns the (position, label) ticks and an array with the position of every code.
+        With an order the ordered labels come first, other known labels follow after them."""
+        key = (len(self.labels), tuple(order) if order else None, start, end)
+        if self.cached[0] == key:
+            return self.cached[1]
+        shown = list(order) if order else []
+        ordered = set(shown)
+        shown += [label for label in self.labels if label not in ordered]
+        if len(shown) == 0:
+            # no categories, i.e. a vlines only plot
+            shown = ['']
+        shown = list(reversed(shown))
+        tick_positions = np.linspace(start, end, len(shown))
+        if len(shown) == 1:
+            tick_positions = np.array([(start + end)/2])
+        lookup = np.full(len(self.labels), np.nan)
+        for position, label in zip(tick_positions, shown):
+            if label in self.codes:
+                lookup[self.codes[label]] = position
+        result = (list(zip(tick_positions, shown)), lookup)
+        self.cached = (key, result)
+        return result
+
+    def copy(self):
+        """an independent table with the same labels and codes, i.e. for reading it in another thread"""
+        table = Categories()
+        table.labels = list(self.labels)
+        table.codes = dict(self.codes)
+        return table
+
+    def clear(self):
+        self.labels = []
+        self.codes = {}
+        self.cached = (None, None)
+
+    def __len__(self):
+        return len(self.labels)
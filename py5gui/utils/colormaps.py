@@ -0,0 +1,47 @@
+import numpy as np
+
+# anchor colors of the colormaps, evenly spaced from low to high values. The matplotlib maps are approximated
+# by 5 anchors each
+ANCHORS = {
+    'viridis': [(68, 1, 84), (59, 82, 139), (33, 145, 140), (94, 201, 98), (253, 231, 37)],
+    'magma':   [(0, 0, 4), (81, 18, 124), (183, 55, 121), (252, 137, 97), (252, 253, 191)],
+    'inferno': [(0, 0, 4), (87, 16, 110), (188, 55, 84), (249, 142, 9), (252, 255, 164)],
+    'hot':     [(0, 0, 0), (230, 0, 0), (255, 210, 0), (255, 255, 255)],
+    'gray':    [(0, 0, 0), (255, 255, 255)],
+}
+
+# lookup tables per colormap
+luts = {}
+
+def colormap(cmap='viridis', n:int=256) -> np.ndarray:
+    """A lookup table of n ARGB colors as an (n, 4) uint8 array, for the name of a colormap in ANCHORS or a list of
+    (r, g, b) anchor colors to interpolate between"""
+    key = (cmap if isinstance(cmap, str) else tuple(map(tuple, cmap)), n)
+    if key not in luts:
+        anchors = np.array(ANCHORS[cmap] if isinstance(cmap, str) else cmap, dtype=np.float64)
+        positions = np.linspace(0, 1, anchors.shape[0])
+        steps = np.linspace(0, 1, n)
+        lut = np.empty((n, 4), dtype=np.uint8)
+        lut[:, 0] = 255
+        for channel in range(3):
+            lut[:, channel + 1] = np.round(np.interp(steps, positions, anchors[:, channel]))
+        luts[key] = lut
+    return luts[key]
+
+def shade(values:np.ndarray, cmap='viridis', log=False, value_range:tuple=None) -> np.ndarray:
+    """Color a 2D array of values with a colormap, returning an array of ARGB pixels with one more dimension of 4 bands.
+    Values are scaled from value_range (default: 0 to their maximum) onto the colormap, with log=True their
+    log(1 + value) is scaled instead, i.e. to show counts of very different magnitudes."""
+    lut = colormap(cmap)
+    values = np.asarray(values, dtype=np.float64)
+    if log:
+        values = np.log1p(values)
+    low, high = (0.0, values.max(initial=0.0)) if value_range is None else value_range
+    if log and value_range is not None:
+        low, high = np.log1p(low), np.log1p(high)
+    if high <= low:
+        idx = np.zeros(values.shape, dtype=np.intp)
+    else:
+        scaled = (values - low) * ((lut.shape[0] - 1) / (high - low))
+        idx = np.clip(np.nan_to_num(scaled), 0, lut.shape[0] - 1).astype(np.intp)
+    return lut[idx]
@@ -0,0 +1,99 @@
+import numpy as np
+
+# Level of detail reduction for line series with far more points than the plot has pixel columns.
+# All strategies expect xs sorted in ascending order (i.e. time series) and return the indices of the points to keep,
+# so the drawn points are always a subset of the original data.
+
+def is_sorted(xs:np.ndarray) -> bool:
+    return xs.shape[0] < 2 or bool(np.all(xs[1:] >= xs[:-1]))
+
+def first_in_bucket(mask:np.ndarray, bucket_ids:np.ndarray) -> np.ndarray:
+    """indices of the first True value of mask within every bucket"""
+    idx = np.flatnonzero(mask)
+    ids = bucket_ids[idx]
+    keep = np.ones(idx.shape[0], dtype=bool)
+    keep[1:] = ids[1:] != ids[:-1]
+    return idx[keep]
+
+def minmax(xs:np.ndarray, ys:np.ndarray, buckets:int, x_range:tuple=None) -> np.ndarray:
+    """Per pixel column envelope: split the x range into buckets (one per pixel column) and keep the points with the
+    minimum and maximum y of every bucket plus the first and last point, resulting in at most 2*buckets + 2 points.
+    As every column still shows its full vertical extent, the drawn line looks the same as with all points."""
+    n = xs.shape[0]
+    lo, hi = x_range if x_range is not None else (xs[0], xs[-1])
+    if hi <= lo:
+        cols = np.zeros(n, dtype=np.int64)
+    else:
+        cols = ((xs - lo) * (buckets / (hi - lo))).astype(np.int64)
+        np.clip(cols, 0, buckets - 1, out=cols)
+    # xs are sorted => every bucket is a contiguous run of points
+    starts = np.flatnonzero(np.r_[True, cols[1:] != cols[:-1]])
+    bucket_ids = np.repeat(np.arange(starts.shape[0]), np.diff(np.r_[starts, n]))
+    mins = np.minimum.reduceat(ys, starts)
+    maxs = np.maximum.reduceat(ys, starts)
+    keep = np.concatenate(([0, n - 1],
+                           first_in_bucket(ys == mins[bucket_ids], bucket_ids),
+                           first_in_bucket(ys == maxs[bucket_ids], bucket_ids)))
+    # sorted unique indices keep the original drawing order and remove doubles where min and max are the same point
+    return np.unique(keep)
+
+def lttb(xs:np.ndarray, ys:np.ndarray, n_out:int) -> np.ndarray:
+    """Largest triangle three buckets: split the points into n_out - 2 buckets of equal count and keep the point of
+    each bucket that spans the largest triangle with its neighbour buckets. Classic LTTB uses the previously selected
+    point as the left triangle corner, which can only be computed one bucket after the other. Here the left corner is
+    the previous bucket's average, like the right corner, so all buckets are computed at once in numpy."""
+    n = xs.shape[0]
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    xs = xs.astype(np.float64, copy=False);   ys = ys.astype(np.float64, copy=False)
+    starts = np.linspace(1, n - 1, n_out - 1).astype(np.int64)[:-1]
+    counts = np.diff(np.r_[starts, n - 1])
+    mean_x = np.add.reduceat(xs[1:n-1], starts - 1) / counts
+    mean_y = np.add.reduceat(ys[1:n-1], starts - 1) / counts
+    # left and right triangle corners of every bucket
+    ax = np.r_[xs[0], mean_x[:-1]];     ay = np.r_[ys[0], mean_y[:-1]]
+    cx = np.r_[mean_x[1:], xs[-1]];     cy = np.r_[mean_y[1:], ys[-1]]
+    bucket_ids = np.repeat(np.arange(starts.shape[0]), counts)
+    px, py = xs[1:n-1], ys[1:n-1]
+    a_x, a_y, c_x, c_y = ax[bucket_ids], ay[bucket_ids], cx[bucket_ids], cy[bucket_ids]
+    areas = np.abs((a_x - c_x) * (py - a_y) - (a_x - px) * (c_y - a_y))
+    largest = np.maximum.reduceat(areas, starts - 1)
+    picks = first_in_bucket(areas == largest[bucket_ids], bucket_ids) + 1
+    return np.concatenate(([0], picks, [n - 1]))
+
+def decimate(xs:np.ndarray, ys:np.ndarray, pixels:int, method:str='minmax', x_range:tuple=None) -> np.ndarray:
+    """Return the indices of the points to draw for a line over a width of pixels with the provided method
+    ('minmax' or 'lttb')"""
+    pixels = max(int(pixels), 1)
+    if method == 'lttb':
+        return lttb(xs, ys, 2 * pixels)
+    return minmax(xs, ys, pixels, x_range)
+
+def minmax_2d(xs:np.ndarray, ys:np.ndarray, buckets:int, x_range:tuple=None, chunk:int=4_000_000) -> tuple:
+    """minmax() for every row of a 2D ys (channels x samples) sharing the xs. Returns the xs and ys of the kept
+    points as arrays of shape (channels, 2 * bucket count): every channel keeps the first point with the min and the
+    max of each bucket in their original order. Channels are processed in groups of about chunk values to bound the
+    memory of the temporary arrays."""
+    n = xs.shape[0]
+    lo, hi = x_range if x_range is not None else (xs[0], xs[-1])
+    if hi <= lo:
+        cols = np.zeros(n, dtype=np.int64)
+    else:
+        cols = ((xs - lo) * (buckets / (hi - lo))).astype(np.int64)
+        np.clip(cols, 0, buckets - 1, out=cols)
+    starts = np.flatnonzero(np.r_[True, cols[1:] != cols[:-1]])
+    bucket_ids = np.repeat(np.arange(starts.shape[0]), np.diff(np.r_[starts, n]))
+    positions = np.arange(n)
+    idx = np.empty((ys.shape[0], 2 * starts.shape[0]), dtype=np.int64)
+    step = max(1, chunk // max(n, 1))
+    for first in range(0, ys.shape[0], step):
+        group = ys[first:first + step]
+        firsts = []
+        for extreme in (np.minimum.reduceat(group, starts, axis=1), np.maximum.reduceat(group, starts, axis=1)):
+            # positions not holding the bucket's extreme are pushed past the end, the smallest remaining is the first
+            found = np.minimum.reduceat(np.where(group == extreme[:, bucket_ids], positions, n), starts, axis=1)
+            # i.e. nan buckets have no position equal to their extreme => use the bucket's first point
+            firsts.append(np.where(found == n, starts, found))
+        idx[first:first + step, 0::2] = np.minimum(*firsts)
+        idx[first:first + step, 1::2] = np.maximum(*firsts)
+    return xs[idx], np.take_along_axis(ys, idx, axis=1)
@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+class GraphicsPool:
+    """Reuses offscreen graphics of a sketch instead of creating new ones.
+
+       Every create_graphics() allocates native buffers, doing so every frame puts pressure on the JVM's garbage
+       collector. Surfaces are requested with .acquire(w, h, renderer) and handed back with .release(graphics).
+       Released surfaces are kept by their size and renderer for later requests, the least recently released ones
+       are dropped once more than max_free are waiting."""
+    def __init__(self, sketch, max_free:int=8):
+        self.s = sketch
+        self.max_free = max_free
+        self.free = OrderedDict()   # id(graphics) -> graphics, ordered from least to most recently released
+        self.keys = {}              # id(graphics) -> (w, h, renderer) of all graphics created by the pool
+
+    def acquire(self, w, h, renderer=None):
+        key = (int(w), int(h), renderer)
+        graphics = None
+        for gid in reversed(self.free):
+            if self.keys[gid] == key:
+                graphics = self.free.pop(gid)
+                break
+        if graphics is None:
+            if renderer is None:
+                graphics = self.s.create_graphics(key[0], key[1])
+            else:
+                graphics = self.s.create_graphics(key[0], key[1], renderer)
+            self.keys[id(graphics)] = key
+        return graphics
+
+    def release(self, graphics):
+        gid = id(graphics)
+        if gid not in self.keys or gid in self.free:
+            return
+        self.free[gid] = graphics
+        while len(self.free) > self.max_free:
+            # least recently used surface => let java collect it
+            old_gid, _ = self.free.popitem(last=False)
+            del self.keys[old_gid]
+
+# one pool per sketch
+pools = {}
+
+def graphics_pool(sketch) -> GraphicsPool:
+    if sketch not in pools:
+        pools[sketch] = GraphicsPool(sketch)
+    return pools[sketch]
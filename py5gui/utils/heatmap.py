@@ -0,0 +1,87 @@
+import numpy as np
+from .colormaps import shade
+from .streaming import RingBuffer
+
+class Waterfall:
+    """A scrolling heatmap of the newest columns of values, i.e. the spectra of a live spectrogram.
+
+       The colored pixels are kept in a persistent ARGB buffer of bins rows and capacity columns. .add(column) only
+       colors and writes the new column at the buffer's head, like a ring buffer the oldest column is overwritten once
+       the capacity is reached. Instead of shifting the buffer the plot draws it in up to two parts, from the oldest
+       column to the end of the buffer and from its start up to the head. The image of the buffer is likewise only
+       updated with the new columns.
+       Attach a waterfall to a Plot with plot.waterfall() - it will then be drawn by every following plot.show()."""
+    def __init__(self, bins:int, capacity:int=500, colormap='viridis', value_range:tuple=(0, 1), log_scale=False):
+        self.bins, self.capacity = int(bins), int(capacity)
+        self.colormap, self.value_range, self.log_scale = colormap, value_range, log_scale
+        # the first row of an image is its top => row 0 holds the highest bin
+        self.pixels = np.zeros((self.bins, self.capacity, 4), dtype=np.uint8)
+        self.xs = RingBuffer(self.capacity)
+        self.head = 0       # the column of the next write
+        self.total = 0      # count of all columns ever added
+        self.image = None
+        self.strip = None   # image of the last uploaded new columns, reused while their count stays the same
+        self.fresh = 0      # count of the columns written since the last upload, ending before the head
+
+    def add(self, column, x=None):
+        """add a column of one value per bin, at x (default: the count of columns added so far)"""
+        return self.extend(np.asarray(column)[None], None if x is None else [x])
+
+    def extend(self, columns, xs=None):
+        """add several columns at once, as an array of shape (count, bins)"""
+        columns = np.asarray(columns, dtype=np.float64)
+        if columns.ndim != 2 or columns.shape[1] != self.bins:
+            print(f'waterfall columns need {self.bins} values each, got an array of shape {columns.shape}')
+            return self
+        if xs is None:
+            xs = self.total + np.arange(columns.shape[0])
+        self.total += columns.shape[0]
+        # only the newest columns fit
+        columns, xs = columns[-self.capacity:], np.asarray(xs)[-self.capacity:]
+        idx = (self.head + np.arange(columns.shape[0])) % self.capacity
+        self.pixels[:, idx] = shade(columns[:, ::-1].T, self.colormap, self.log_scale, self.value_range)
+        self.xs.extend(xs)
+        self.head = (self.head + columns.shape[0]) % self.capacity
+        self.fresh = min(self.fresh + columns.shape[0], self.capacity)
+        return self
+
+    def parts(self) -> list:
+        """(first column, column count) of the buffer's parts to draw from the oldest to the newest column"""
+        size = len(self.xs)
+        if size < self.capacity:
+            return [(0, size)]
+        return [(first, count) for first, count in ((self.head, self.capacity - self.head), (0, self.head))
+                if count > 0]
+
+    def py5image(self, sketch):
+        """the pixel buffer as an image of the sketch, of which only the columns added since the last call are
+        uploaded again"""
+        if self.image is None:
+            self.image = sketch.create_image_from_numpy(self.pixels, bands='ARGB')
+        elif self.fresh == self.capacity:
+            self.image = sketch.create_image_from_numpy(self.pixels, bands='ARGB', dst=self.image)
+        elif self.fresh > 0:
+            # the new columns are up to two runs of the circular buffer
+            first = (self.head - self.fresh) % self.capacity
+            tail = min(self.fresh, self.capacity - first)
+            for start, count in ((first, tail), (0, self.fresh - tail)):
+                if count == 0:
+                    continue
+                columns = np.ascontiguousarray(self.pixels[:, start:start + count])
+                if self.strip is not None and self.strip.width == count:
+                    self.strip = sketch.create_image_from_numpy(columns, bands='ARGB', dst=self.strip)
+                else:
+                    self.strip = sketch.create_image_from_numpy(columns, bands='ARGB')
+                self.image.set_pixels(start, 0, self.strip)
+        self.fresh = 0
+        return self.image
+
+    def clear(self):
+        self.pixels[:] = 0
+        self.xs.clear()
+        self.head = 0
+        self.fresh = self.capacity
+        return self
+
+    def __len__(self):
+        return len(self.xs)
@@ -1,55 +1,161 @@
 import numpy as np
+import time
+import warnings
 import py5
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from .streaming import StreamingSeries, StreamingHistogram
+from .categories import Categories, is_categorical
+from .text_metrics import text_metrics
+from .graphics_pool import graphics_pool
+from .colormaps import shade
+from .heatmap import Waterfall
+from .spatial import GridIndex, nearest_sorted
+from .decimate import decimate as decimate_indices, is_sorted, minmax_2d
+from .batch import MARKERS, colors_to_argb, draw_vertices, glyph, is_gl, quads, segments, stamp, stamp_uvs
 
 def remap(value, inFrom, inTo, outFrom, outTo):
+    if isinstance(value, np.ndarray) and value.dtype.kind in 'iub':
+        # integer data, i.e. int16 samples, would wrap around when subtracting inFrom
+        value = value.astype(np.float64)
     if inFrom == inTo:
         # special case where in-values are the same => remap() would zero divide => broadcast center as result
         return (value*0) + ((outFrom + outTo)/2)
     return outFrom + (outTo - outFrom) * ((value - inFrom) / (inTo - inFrom))
 
+def as_array(values, copy=False, read_only=False) -> np.ndarray:
+    """Plot data as an ndarray. ndarrays of any dtype, including views like the columns of structured arrays, and
+    objects with the buffer protocol like memoryviews are used as they are without copying. Other sequences like lists
+    are converted to a new array. copy=True always copies, read_only=True stores a view that can't be written to."""
+    array = np.array(values) if copy else np.asarray(values)
+    if read_only:
+        array = array.view()
+        array.flags.writeable = False
+    return array
+
+def value_range(values:np.ndarray) -> tuple:
+    """(min, max) of an array as python floats, ignoring NaNs. None if there are no values"""
+    if values.size == 0:
+        return None
+    low, high = np.min(values), np.max(values)
+    if np.isnan(low) or np.isnan(high):
+        # only then pay for the NaN aware search
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return None
+        low, high = np.min(values), np.max(values)
+    return float(low), float(high)
+
+def as_color(color):
+    """A color argument in one of two forms, normalized once when the data is provided: a single color as a tuple of
+    numbers, or one color per data point (or channel) like a list of tuples or an (n, 3) array. None stays None."""
+    number = lambda value: value.item() if isinstance(value, np.generic) else value
+    if color is None:
+        return None
+    if isinstance(color, (int, float, np.number)):
+        # a single grey value
+        return (number(color),)
+    if len(color) == 0:
+        return None
+    if np.ndim(color[0]) == 0:
+        return tuple(number(value) for value in color)
+    return color
+
+# memoized tick labels per (value, decimals, form), shared by all plots
+label_cache = {}
+
+# worker threads for .show(background=True), shared by all plots. numpy releases the GIL during its array
+# operations, so most of the preparation runs in parallel to the sketch's animation thread
+workers = None
+
+def background_workers() -> ThreadPoolExecutor:
+    global workers
+    if workers is None:
+        workers = ThreadPoolExecutor(max_workers=2, thread_name_prefix='py5gui-plot')
+    return workers
+
 class Plot:
     """While matplotlib can be incorporated into py5 sketches with its agg backend, updating its plots is very
        computationally expensive. This class offers a minimal set of plotting functionalities for situations
        where the goal is to avoid matplotlib's performance impact on the larger program.
        
-       .plot(), .scatter() and .axvline() can be used to enter xs and ys data, which will be plotted together
+       .plot(), .scatter(), .axvline(), .bar() and .hist() can be used to enter xs and ys data, which will be plotted together
        upon the following call to .show(). by default .plot(), .scatter(). and .axvline will use the left y_axis=0, but you
        can use y_axis=1 to have their data be plotted on a secondary y axis, to keep track of different ranges of numerical 
        results, or even mix numerical and categorical data in the same plot."""
     def __init__(self, x, y, w, h, sketch:py5.Sketch=None):
         self.plots = []     #contains dicts of {'xs', 'ys', 'cols', 'type'}
+        self.streams = []   #contains (StreamingSeries, plot dict without data) pairs that persist across .show()
+        # categorical y data is stored as integer codes into a category table per y axis, which persists across .show()
+        self.categories = {0: Categories(), 1: Categories()}
+
+        # retained layer with the frame, ticks and labels, only redrawn when the axes change. see .show(retain_axes=)
+        self.axes_layer = None
+        self.axes_key = None
+        self.axes_ranges = None
+        self.prepared_axes = (None, None)   # (key, layout and ticks) of the last prepared retained axes
+
+        # double buffered preparation in a worker thread, see .show(background=)
+        self.pending = None     # future of the frame that is being prepared
+        self.ready = None       # (frame count, prepared frame) of the last completed preparation
 
         if sketch == None:
             self.s = py5.get_current_sketch()
         else:
             self.s = sketch
         
-        self.move(x, y, w, h)
+        # offscreen surface for .show(to_py5image=True) and .show(max_hz=), only taken from the sketch's graphics pool once it is used
+        self.graphics = None
+        self.refreshed = None   # (time, xlim) of the last refresh with .show(max_hz=)
+        # images of density scatters and heatmaps, reused by the following frames
+        self.images = {}
 
-        self.graphics = self.s.create_graphics(w, h)
+        # viewport of the x axis, None autoscales to all data. see .set_xlim() and .show(navigate=)
+        self.xlim = None
+        self.shown_x_range = None   # the x range of the last drawn frame
+        self.dragging = None        # whether a mouse press started on the plot, None while the mouse isn't pressed
+        self.hovered = (None, [])   # (frame, hover targets) of the last hovered frame, see .show(hover=)
+        self.move(x, y, w, h)
 
     def calc_dimensions(self, up_extra=0, left_extra=0, bottom_extra=0, right_extra=0, to_graphics=False):
+        dims = self.layout((self.x, self.y, self.w, self.h), up_extra, left_extra, bottom_extra, right_extra,
+                           to_graphics)
+        self.apply_dims(dims)
+
+    def apply_dims(self, dims:dict):
+        """Take over the frames of a layout. Its x, y become the drawing origin, that is 0, 0 when drawing into an
+        offscreen image, while the plot keeps its position on the sketch."""
+        self.origin = (dims['x'], dims['y'])
+        for name, value in dims.items():
+            if name not in ('x', 'y'):
+                setattr(self, name, value)
+
+    def layout(self, box, up_extra=0, left_extra=0, bottom_extra=0, right_extra=0, to_graphics=False) -> dict:
+        """the dimensions of the plot's frames for a (x, y, w, h) box, without changing the plot"""
+        d = {}
+        d['x'], d['y'], w, h = box
         if to_graphics:
             # offset the x and y positions to 0
-            self.x = 0
-            self.y = 0
-        
+            d['x'] = 0
+            d['y'] = 0
+
         # inner sizes:
-        self.xi = self.x +20 + left_extra
-        self.yi = self.y +10 + up_extra
-        self.wi = self.w -30 - left_extra - right_extra
-        self.hi = self.h -50 - up_extra - bottom_extra
-        self.ri = self.xi + self.wi        #right inner
-        self.bi = self.yi + self.hi        #bottom inner
+        d['xi'] = d['x'] +20 + left_extra
+        d['yi'] = d['y'] +10 + up_extra
+        d['wi'] = w -30 - left_extra - right_extra
+        d['hi'] = h -50 - up_extra - bottom_extra
+        d['ri'] = d['xi'] + d['wi']        #right inner
+        d['bi'] = d['yi'] + d['hi']        #bottom inner
 
         #inner inner frame:
         inner_dist = 15
-        self.xii = self.xi + inner_dist
-        self.yii = self.yi + inner_dist
-        self.wii = self.wi - 2*inner_dist
-        self.hii = self.hi - 2*inner_dist
-        self.rii = self.xii + self.wii
-        self.bii = self.yii + self.hii
+        d['xii'] = d['xi'] + inner_dist
+        d['yii'] = d['yi'] + inner_dist
+        d['wii'] = d['wi'] - 2*inner_dist
+        d['hii'] = d['hi'] - 2*inner_dist
+        d['rii'] = d['xii'] + d['wii']
+        d['bii'] = d['yii'] + d['hii']
+        return d
 
     def move(self, x:int=0, y:int=0, w:int=500, h:int=200):
         """update the position and size of the plot.
@@ -62,33 +168,269 @@ class Plot:
             h (int): height
         """
         self.x, self.y, self.w, self.h = x, y, w, h
+        # the top left of the last drawn layout, see .apply_dims()
+        self.origin = (x, y)
+        # surfaces of the previous size go back to the pool
+        for name in ('graphics', 'axes_layer'):
+            g = getattr(self, name, None)
+            if g is not None and (g.width != w or g.height != h):
+                graphics_pool(self.s).release(g)
+                setattr(self, name, None)
+
+    def __del__(self):
+        # a plot created anew every frame hands its surfaces back to the pool for the next frame's plot
+        for name in ('graphics', 'axes_layer'):
+            g = getattr(self, name, None)
+            if g is not None:
+                graphics_pool(self.s).release(g)
 
     #-------------------------DATA ENTRY FUNCTIONS-------------------------
+    # The data entry functions don't copy numpy arrays, memoryviews or array columns, they keep referencing the
+    # provided data until it is drawn. If you modify your arrays in place before .show() (or before a background
+    # frame of .show(background=True) is prepared) pass copy=True. read_only=True keeps a view of your data that
+    # raises an error on any write through the plot.
 
-    def plot(self, xs:list, ys:list, color=None, stroke_weight=1, y_axis=0):
+    def plot(self, xs:list, ys:list, color=None, stroke_weight=1, y_axis=0, decimate='minmax', copy=False,
+             read_only=False, offsets=None, assume_sorted=False):
+        """decimate= can be 'minmax', 'lttb' or None. When a graph has many more points than the plot has pixel columns
+        only a subset of the points that looks the same will be drawn, see .show(decimate=)
+        ys can also be a 2D array of channels x samples sharing the xs, i.e. a multichannel recording. All channels are
+        remapped and drawn together as a single batch, color= is then a color for all channels or a list with one
+        color per channel and offsets= a vertical offset per channel, i.e. to stack the channels. Their decimation
+        always keeps the min and max of every pixel column.
+        assume_sorted=True promises ascending xs, so the xs don't have to be checked every frame before cutting them
+        to the x viewport or decimating them with a binary search."""
+        if np.ndim(ys) == 2:
+            ys = as_array(ys, copy, read_only)
+            if len(xs) == 0 or len(xs) != ys.shape[1]:
+                return
+            offsets = np.zeros(ys.shape[0]) if offsets is None else \
+                      np.broadcast_to(np.asarray(offsets, dtype=np.float64), (ys.shape[0],))
+            self.plots.append({'xs': as_array(xs, copy, read_only), 'ys': ys, 'offsets': offsets,
+                               'categorical': False, 'color': as_color(color), 'decimate': decimate, 'type': 'lines',
+                               'stroke weight': stroke_weight, 'y axis': y_axis})
+            if assume_sorted:
+                self.plots[-1]['sorted'] = True
+            return self
         if len(xs) == 0 or len(xs) != len(ys):
             return
-        self.plots.append({'xs': np.array(xs), 'ys': np.array(ys), 'color': color,
-                           'type': 'lines', 'stroke weight': stroke_weight, 'y axis': y_axis})
+        ys, categorical = self.y_data(ys, y_axis, copy, read_only)
+        self.plots.append({'xs': as_array(xs, copy, read_only), 'ys': ys, 'categorical': categorical,
+                           'color': as_color(color), 'decimate': decimate, 'type': 'lines',
+                           'stroke weight': stroke_weight, 'y axis': y_axis})
+        if assume_sorted:
+            self.plots[-1]['sorted'] = True
         return self
 
     def scatter(self, xs:list, ys:list, color:list=None, diameter=7, 
-                order=None, marker='circle', stroke_weight=1, y_axis=0):
+                order=None, marker='circle', stroke_weight=1, y_axis=0, render='markers', colormap='viridis',
+                log_scale=True, copy=False, read_only=False, assume_sorted=False):
+        """render='density' draws the number of points per pixel colored with the colormap= instead of markers,
+        as a single image for any number of points. log_scale= colors by log(1 + count) to keep sparse areas
+        visible. The colormap can be a name from colormaps.ANCHORS or a list of (r, g, b) colors.
+        color= is a single color or one color per point, as a list of color tuples or an (n, 3) or (n, 4) array.
+        assume_sorted=True promises ascending xs, like with .plot()."""
         if len(xs) == 0 or len(xs) != len(ys):
             return
-        ys = np.array(ys) if not isinstance(ys[0], str) else ys
-        self.plots.append({'xs': np.array(xs), 'ys': ys, 'color': color, 'type': 'scatter',
+        ys, categorical = self.y_data(ys, y_axis, copy, read_only)
+        self.plots.append({'xs': as_array(xs, copy, read_only), 'ys': ys, 'categorical': categorical,
+                           'color': as_color(color), 'type': 'scatter',
                            'diameter': diameter, 'marker': marker, 'stroke weight': stroke_weight,
-                           'order': order, 'y axis': y_axis})
+                           'order': order, 'y axis': y_axis, 'render': render, 'colormap': colormap,
+                           'log scale': log_scale})
+        if assume_sorted:
+            self.plots[-1]['sorted'] = True
         return self
     
-    def axvline(self, xs:list, color=None, stroke_weight=1, y_axis=0):
+    def axvline(self, xs:list, color=None, stroke_weight=1, y_axis=0, copy=False, read_only=False):
         if len(xs) == 0:
             return
-        self.plots.append({'xs': np.array(xs), 'ys': [], 'color': color,
+        self.plots.append({'xs': as_array(xs, copy, read_only), 'ys': [], 'color': as_color(color),
                            'type': 'vlines', 'stroke weight': stroke_weight, 'y axis': y_axis})
         return self
 
+    def bar(self, xs:list, heights:list, width=0.8, bottom=0, color=None, y_axis=0, copy=False, read_only=False):
+        """Bars centered on the xs from bottom= up to the heights. The width= in x units and the bottom= can also
+        be an array with a value per bar and color= a list with a color per bar."""
+        if len(xs) == 0 or len(xs) != len(heights):
+            return
+        self.plots.append(self.bars(as_array(xs, copy, read_only), as_array(heights, copy, read_only), width,
+                                    bottom, color, y_axis))
+        return self
+
+    def hist(self, values:list, bins=10, range:tuple=None, density=False, color=None, y_axis=0):
+        """A histogram of the values, binned with np.histogram. bins= is a number of equal bins within range=
+        (default: the min and max of the values) or an array of bin edges. With density=True the bars show the
+        probability density instead of the counts."""
+        if len(values) == 0:
+            return
+        counts, edges = np.histogram(values, bins=bins, range=range, density=density)
+        self.plots.append(self.histogram_bars(counts, edges, color, y_axis))
+        return self
+
+    def hist_stream(self, bins=10, range:tuple=(0, 1), capacity:int=10_000, series:StreamingSeries=None,
+                    density=False, color=None, y_axis=0) -> StreamingSeries:
+        """Attach a StreamingSeries whose ys are shown as a histogram and return it. Only newly appended values are
+        binned by every .show(), the counts include all values ever appended. As the bins can't adapt to values that
+        aren't there yet, they are fixed by bins= and range= or given as an array of bin edges."""
+        if series is None:
+            series = StreamingSeries(capacity)
+        edges = np.histogram_bin_edges([], bins=bins, range=range)
+        entry = {'type': 'hist', 'histogram': StreamingHistogram(series, edges), 'density': density,
+                 'color': color, 'y axis': y_axis}
+        self.streams.append((series, entry))
+        return series
+
+    def heatmap(self, matrix, extent:tuple=None, colormap='viridis', value_range:tuple=None, log_scale=False,
+                y_axis=0):
+        """Show a 2D matrix of values as an image colored with the colormap, its first row on top like with images.
+        extent=(left, right, bottom, top) places the image on the axes, by default one x and y unit per value.
+        value_range=(min, max) fixes the values at the ends of the colormap, by default 0 and the largest value."""
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.size == 0:
+            print(f'heatmap needs a 2D matrix of values, got an array of shape {matrix.shape}')
+            return
+        left, right, bottom, top = extent if extent is not None else (0, matrix.shape[1], 0, matrix.shape[0])
+        self.plots.append({'xs': np.array([left, right]), 'ys': np.array([bottom, top]), 'categorical': False,
+                           'type': 'heatmap', 'values': matrix, 'colormap': colormap, 'value range': value_range,
+                           'log scale': log_scale, 'color': None, 'stroke weight': 1, 'y axis': y_axis})
+        return self
+
+    def waterfall(self, bins:int, capacity:int=500, extent:tuple=None, colormap='viridis', value_range:tuple=(0, 1),
+                  log_scale=False, waterfall:Waterfall=None, y_axis=0) -> Waterfall:
+        """Attach a scrolling heatmap of the newest columns of values and return it, i.e. for a spectrogram. Like with
+        .stream() it persists across .show(), use .add(column, x) on the returned Waterfall to add a column of one
+        value per bin. extent=(bottom, top) places the bins on the y axis, by default one y unit per bin. The colors
+        of a column are fixed when it is added, so the value_range= of the colormap can't adapt to later data."""
+        if waterfall is None:
+            waterfall = Waterfall(bins, capacity, colormap, value_range, log_scale)
+        bottom, top = extent if extent is not None else (0, waterfall.bins)
+        self.streams.append((waterfall, {'type': 'waterfall', 'extent': (bottom, top), 'y axis': y_axis}))
+        return waterfall
+
+    def histogram_bars(self, counts, edges, color=None, y_axis=0):
+        """a bars plot with one full width bar per bin"""
+        return self.bars((edges[:-1] + edges[1:]) / 2, np.asarray(counts, dtype=np.float64), np.diff(edges), 0,
+                         color, y_axis)
+
+    def bars(self, xs:np.ndarray, heights:np.ndarray, width, bottom, color, y_axis) -> dict:
+        """The plot dict of a bars plot. Its ranges include the bar edges and bottoms, not just the xs and heights."""
+        half = np.broadcast_to(np.asarray(width, dtype=np.float64) / 2, xs.shape)
+        bottom = np.broadcast_to(np.asarray(bottom, dtype=np.float64), xs.shape)
+        return {'xs': xs, 'ys': heights, 'categorical': False, 'color': as_color(color), 'type': 'bars',
+                'half width': half,
+                'bottom': bottom, 'stroke weight': 1, 'y axis': y_axis,
+                'xs range': (float(np.min(xs - half)), float(np.max(xs + half))),
+                'ys range': (float(min(np.min(heights), np.min(bottom))), float(max(np.max(heights), np.max(bottom))))}
+
+    def y_data(self, ys, y_axis, copy=False, read_only=False):
+        """numerical ys as an array, or categorical ys encoded as codes into the y axis' category table"""
+        if is_categorical(ys):
+            return self.categories[y_axis].encode(ys), True
+        return as_array(ys, copy, read_only), False
+
+    def reset_categories(self):
+        """forget the categories collected from categorical data so far, i.e. when reusing a plot for other data"""
+        for categories in self.categories.values():
+            categories.clear()
+        return self
+
+    def set_xlim(self, left, right):
+        """Only show the data between left and right on the x axis. Only the visible part of series with ascending
+        xs is processed and drawn, so the cost of showing a window of a long series depends on the visible points."""
+        if right <= left:
+            print(f'the left x limit has to be smaller than the right one: {left} >= {right}')
+            return self
+        self.xlim = (float(left), float(right))
+        return self
+
+    def reset_xlim(self):
+        """autoscale the x axis to all data again"""
+        self.xlim = None
+        return self
+
+    def zoom(self, factor, center=None):
+        """scale the shown x range by factor around the x value center (default: the middle), factor < 1 zooms in"""
+        limits = self.xlim if self.xlim is not None else self.shown_x_range
+        if limits is None:
+            return self
+        left, right = limits
+        if center is None:
+            center = (left + right) / 2
+        return self.set_xlim(center - (center - left) * factor, center + (right - center) * factor)
+
+    def pan(self, dx):
+        """move the shown x range by dx in x units"""
+        limits = self.xlim if self.xlim is not None else self.shown_x_range
+        if limits is None:
+            return self
+        return self.set_xlim(limits[0] + dx, limits[1] + dx)
+
+    def mouse_xy(self) -> tuple:
+        """the mouse position in the coordinates the plot was drawn in, which start at 0, 0 for an offscreen image
+        drawn at the plot's position"""
+        return self.s.mouse_x - self.x + self.origin[0], self.s.mouse_y - self.y + self.origin[1]
+
+    def mouse_over(self) -> bool:
+        """whether the mouse is within the inner frame of the last drawn plot"""
+        if self.shown_x_range is None:
+            return False
+        mouse_x, mouse_y = self.mouse_xy()
+        return self.xi <= mouse_x <= self.ri and self.yi <= mouse_y <= self.bi
+
+    def mouse_x_value(self):
+        """the x value below the mouse in the last drawn plot"""
+        return remap(self.mouse_xy()[0], self.xii, self.rii, *self.shown_x_range)
+
+    def mouse_wheel(self, e):
+        """Zoom the x axis around the mouse when scrolling over the plot. py5 only passes mouse wheel events to the
+        sketch's mouse_wheel(e) function, forward them to the plot from there:
+        def mouse_wheel(e):
+            plt.mouse_wheel(e)"""
+        if self.mouse_over():
+            self.zoom(1.2 ** e.get_count(), center=self.mouse_x_value())
+
+    def navigate(self):
+        """pan the x axis while the mouse is dragged across the plot, polled by .show(navigate=True)"""
+        if not self.s.is_mouse_pressed:
+            self.dragging = None
+            return
+        if self.dragging is None:
+            # only a press that started on the plot drags it
+            self.dragging = self.mouse_over()
+        elif self.dragging and self.s.mouse_x != self.s.pmouse_x:
+            left, right = self.shown_x_range
+            self.pan((self.s.pmouse_x - self.s.mouse_x) * (right - left) / self.wii)
+
+    def stream(self, capacity:int=10_000, series:StreamingSeries=None, type:str='lines', color=None,
+               stroke_weight=1, diameter=7, marker='circle', y_axis=0, decimate='minmax', levels:int=0,
+               factor:int=4) -> StreamingSeries:
+        """Attach a StreamingSeries to the plot and return it. Unlike data from .plot() and .scatter() the series
+        is not reset by .show(), so instead of resubmitting all data every frame you can .append(x, y) or
+        .extend(xs, ys) new data points to the returned series.
+
+        Args:
+            capacity (int, optional): the number of newest points to keep when creating a new series. Defaults to 10_000.
+            levels (int, optional): the number of min/max/mean pyramid levels of a new series, each reducing the
+                level below by factor. Zoomed out views of long series draw a level instead of all points. Defaults to 0.
+            series (StreamingSeries, optional): an existing series to attach instead of creating a new one.
+            type (str, optional): 'lines' or 'scatter'. Defaults to 'lines'.
+            color, stroke_weight, diameter, marker, y_axis, decimate: like in .plot() and .scatter()
+        """
+        if series is None:
+            series = StreamingSeries(capacity, levels=levels, factor=factor)
+        entry = {'color': as_color(color), 'type': type, 'stroke weight': stroke_weight, 'y axis': y_axis}
+        if type == 'scatter':
+            entry.update({'diameter': diameter, 'marker': marker, 'order': None})
+        else:
+            entry['decimate'] = decimate
+        self.streams.append((series, entry))
+        return series
+
+    def remove_stream(self, series:StreamingSeries):
+        self.streams = [(st, entry) for st, entry in self.streams if st is not series]
+        return self
+
     def find_decimals(self, minn, maxn, decimals=None):
         form = 'f'
         if decimals == None:
@@ -108,63 +450,70 @@ class Plot:
 
         return decimals, form
 
-    def tick_pos_labels(self, p, nums, start, end, horizontal=True, decimals=None, ylimit:tuple=(None, None)):
-        # TODO: Could add an alternative find_ticks() more resembling matplotlib. If mpl plots data [0.31, ..., 1.67]
-        # it won't lerp ticks from A to B, but have ~3-8 ticks (depending on size) like [0.25, 0.75, 0.125, 0.175]
-        # => it will np.arange(lower, higher, tick_step) with the lower and upper being min(nums -%tick_step)
-        # and max(nums + 1 - %tick_step). The tick_step is in units of .2 or .5 or 1 or 10 or... (also seen .25)
-        # depending on the range dealt with to cover 3-8 ticks
+    def nice_step(self, raw_step):
+        """the smallest matplotlib style "nice" step of 1, 2, 2.5 or 5 * 10^k that is >= raw_step"""
+        magnitude = 10.0 ** np.floor(np.log10(raw_step))
+        for nice in (1, 2, 2.5, 5, 10):
+            if nice * magnitude >= raw_step * (1 - 1e-9):
+                return nice * magnitude
+        return 10 * magnitude
+
+    def tick_label(self, value, decimals, form):
+        """formatted tick label, memoized per (value, decimals, form)"""
+        key = (value, decimals, form)
+        if key not in label_cache:
+            if len(label_cache) > 10_000:
+                label_cache.clear()
+            label_cache[key] = f'{value:.{decimals}{form}}'
+        return label_cache[key]
+
+    def label_width(self, value, decimals, form, metrics=None):
+        """text width of a formatted tick label, measured with the plot's cached text metrics"""
+        return (self.metrics if metrics is None else metrics).width(self.tick_label(value, decimals, form))
+
+    def tick_pos_labels(self, p, minn, maxn, start, end, horizontal=True, decimals=None, metrics=None):
+        """Ticks at "nice" values (steps of 1, 2, 2.5 or 5 * 10^k) within the [minn, maxn] range, with as many ticks
+        as fit into the pixel extent from start to end. Only depends on the range, not on the amount of data."""
+        metrics = self.metrics if metrics is None else metrics
         if not horizontal:
             # ! processing y coords are inverted
             start, end = end, start
-        nums = np.array(nums)
-        # remove duplicates to not end up with multiple axis ticks of the same initial value
-        nums = np.unique(nums)
-        # find the widest number text
-        maxn = np.max(nums);  minn = np.min(nums)
-        if ylimit[0] is not None:
-            minn = ylimit[0]
-        if ylimit[1] is not None:
-            maxn = ylimit[1]
-        if ylimit[0] is not None or ylimit[1] is not None:
-            # create numbers in the range filling the required ylimit
-            nums = np.linspace(minn, maxn, 30)
-        
+        auto_decimals = decimals is None
+        if not (np.isfinite(minn) and np.isfinite(maxn)):
+            # no range to place ticks in, i.e. data of only NaNs or infinities
+            return []
         decimals, form = self.find_decimals(minn, maxn, decimals=decimals)
+        if minn == maxn:
+            return [((start + end)/2, self.tick_label(minn, decimals, form))]
 
+        # find the widest number text
         widest_num = maxn if maxn > np.abs(minn) else minn
-        
         if horizontal:
-            num_width = p.text_width(f'{widest_num:.{decimals}{form}}') * 1.5
+            num_width = self.label_width(widest_num, decimals, form, metrics) * 1.5
         else:
-            num_width = p.text_ascent() * 2.5
-        
-        num_ticks = int(abs(end-start) / num_width)
-        if nums.shape[0] < num_ticks:
-            # less numbers than ticks exists, put a tick at every number
-            tick_positions = np.linspace(start, end, nums.shape[0])
-            if nums.shape[0] == 1:
-                tick_positions = np.array([(start + end)/2])
-            tick_labels = [f'{num:.{decimals}{form}}' for num in np.sort(nums)]
-        else:            
-            tick_positions = np.linspace(start, end, num_ticks)
-            tick_labels = remap(tick_positions, start, end, minn, maxn)
-            tick_labels = [f'{tick_label:.{decimals}{form}}' for tick_label in tick_labels]
-        return list(zip(tick_positions, tick_labels))
-
-    def tick_pos_labels_categorical(self, labels, start, end, order=None, horizontal=False):
+            num_width = metrics.ascent * 2.5
+        max_ticks = max(int(abs(end-start) / num_width), 2)
+
+        step = self.nice_step((maxn - minn) / (max_ticks - 1))
+        first = np.ceil(minn / step - 1e-9)
+        last = np.floor(maxn / step + 1e-9)
+        # + 0.0 turns -0.0 into 0.0 for the labels
+        values = np.arange(first, last + 1) * step + 0.0
+        if auto_decimals and form == 'f':
+            # just enough decimals to tell the steps apart, i.e. 2 for a step of 0.25
+            exponent = int(np.floor(np.log10(step) + 1e-9))
+            decimals = max(0, -exponent + (1 if round(step / 10.0**exponent, 3) == 2.5 else 0))
+
+        tick_positions = remap(values, minn, maxn, start, end)
+        labels = [self.tick_label(float(value), decimals, form) for value in values]
+        return list(zip(tick_positions, labels))
+
+    def tick_pos_labels_categorical(self, categories:Categories, start, end, order=None, horizontal=False):
+        """ticks for all known categories and an array with the position of every category code"""
         if not horizontal:
             # ! processing y coords are inverted
             start, end = end, start
-        uniques = list(set(labels))
-        if order:
-            uniques = list(reversed(order))
-        tick_positions = np.linspace(start, end, len(uniques))
-        if len(uniques) == 1:
-            tick_positions = np.array([(start + end)/2])
-        tick_lookup = {uniques[i]: tick_positions[i] for i in range(len(uniques))}
-        
-        return list(zip(tick_positions, uniques)), tick_lookup
+        return categories.positions(start, end, order=order)
 
     def check_categorical_numerical(self, plots):
         plotable = True
@@ -175,179 +524,434 @@ class Plot:
             if len(plt['ys']) != 0:
                 if categorical == None:
                     # define y_categorical based on the first plt
-                    categorical = True if isinstance(plt['ys'][0], str) else False
+                    categorical = plt.get('categorical', False)
                 else:
-                    if categorical != isinstance(plt['ys'][0], str):
+                    if categorical != plt.get('categorical', False):
                         print('mixing numerical and categorical y axis data - aborting plot')
                         plotable = False
-                        self.reset()
                        
             if 'order' in plt:
                 order = plt['order']
         if categorical == None and len(plots) > 0:
-            # no y data encountered, i.e. a vlines only plot => simulate y data
+            # no y data encountered, i.e. a vlines only plot => use a categorical axis without categories
             categorical = True
-            for plt in plots:
-                plt['ys'] = ['' for x in plt['xs']]
         return categorical, order, plotable
 
 
     def show(self, x_decimals=None, title=None, xlabel=None, ylabel=None, y_decimals=None,
-             ylimit=(None, None), autoscale_in_ylimits=(False,False), to_py5image=False, 
-             y_decimals_1=None, ylimit_1=(None, None), autoscale_in_ylimits_1=(False,False),  
-             empty_warning=True, show_outline=False, show_helper_lines=False):
+             ylimit=(None, None), autoscale_in_ylimits=(False,False), to_py5image=False,
+             y_decimals_1=None, ylimit_1=(None, None), autoscale_in_ylimits_1=(False,False),
+             empty_warning=True, show_outline=False, show_helper_lines=False, decimate=True, decimate_threshold=None,
+             retain_axes=False, range_hysteresis=0.0, background=False, max_stale_frames=2, navigate=False,
+             hover=False, max_hz=None):
         """If to_py5image=True, this function will not draw onto the plot's py5 instance, but instead return a py5_graphics
         object with the plot, which can be used as an image, when the plot doesn't need to be updated every frame.
         .show() can also draw a title, xlabel, and ylabel if provided with a string argument.
         .show() can further be provided with x_decimals= and y_decimals= for overriding the shown decimal places, and with a
         ylimit=(lower, upper) to only plot numerical data above and/or below a certain min, max value pair.
         ylimit=(-7, None) for example would only plot data points with a y of -7 or higher.
-        autoscale_in_ylimits (default:(False,False)): when using ylimit and/or ylimit_1 reenable autoscaling within those limits."""
-        if not to_py5image:
+        autoscale_in_ylimits (default:(False,False)): when using ylimit and/or ylimit_1 reenable autoscaling within those limits.
+        decimate (default:True): graphs with more than decimate_threshold points (default: 4 points per pixel column of
+        the plot) are reduced to about 2 points per pixel column with their .plot(decimate=) method before drawing.
+        retain_axes (default:False): render the frame, ticks, tick labels, title and axis labels once into an offscreen
+        layer and only redraw this layer when the axis ranges, decimals, size or labels change. Every other frame only
+        the data is drawn on top of the retained layer.
+        range_hysteresis (default:0.0): with retain_axes, keep the previous axis ranges as long as the data still fits
+        within them and they are at most this fraction larger than the data range, i.e. 0.1 for 10%. This avoids
+        rebuilding the axes layer for small autoscaling changes.
+        background (default:False): compute the ranges, ticks and vertex coordinates of the plot in a worker thread
+        instead of the sketch's animation thread. .show() hands the newest data to the worker and draws the last
+        completed result, so the drawn data can lag a few frames behind.
+        max_stale_frames (default:2): with background, wait for the worker once the last completed result is more
+        than this many frames older than the newest data. None never waits, nothing is drawn until the first result
+        is ready.
+        navigate (default:False): pan the x axis by dragging the mouse across the plot. Zooming with the mouse wheel
+        needs the sketch's wheel events, see .mouse_wheel(). The x axis can also be set with .set_xlim().
+        hover (default:False): mark the data point closest to the mouse with a crosshair and show its x and y value.
+        Graphs and scatter plots are searched with an index of the drawn points, that is only built once per drawn
+        frame while the mouse is over the plot. Not available with to_py5image or max_hz.
+        max_hz (default:None): render the plot at most this many times per second into an offscreen image, that is
+        drawn again in between. The data provided with .plot(), .scatter() etc. since the last refresh is dropped,
+        streams keep collecting. Slowly changing plots can so be refreshed less often than the sketch's frame rate."""
+        if navigate:
+            self.navigate()
+        offscreen = to_py5image or max_hz is not None
+        if max_hz is not None:
+            now = time.perf_counter()
+            if (self.graphics is not None and self.refreshed is not None and now - self.refreshed[0] < 1 / max_hz
+                and self.refreshed[1] == self.xlim):
+                # too early to refresh => show the last rendered image again
+                self.reset()
+                if to_py5image:
+                    return self.graphics
+                self.s.image(self.graphics, self.x, self.y)
+                return
+            self.refreshed = (now, self.xlim)
+        if not offscreen:
             p = self.s
         else:
+            if self.graphics is None:
+                self.graphics = graphics_pool(self.s).acquire(self.w, self.h)
             p = self.graphics
             p.begin_draw()
-            p.background(0)
+            if to_py5image:
+                p.background(0)
+            else:
+                # drawn onto the sketch like a plot drawn directly
+                p.clear()
+
+        # all text of the plot is measured with the shared metrics of the default font at size 14
+        self.metrics = text_metrics(self.s, size=14)
+        plots = self.take_plots(copy_streams=background)
+        options = {'x_decimals': x_decimals, 'y_decimals': y_decimals, 'y_decimals_1': y_decimals_1,
+                   'title': title, 'xlabel': xlabel, 'ylabel': ylabel, 'ylimit': ylimit, 'ylimit_1': ylimit_1,
+                   'autoscale_in_ylimits': autoscale_in_ylimits, 'autoscale_in_ylimits_1': autoscale_in_ylimits_1,
+                   'to_py5image': offscreen, 'empty_warning': empty_warning, 'show_outline': show_outline,
+                   'show_helper_lines': show_helper_lines, 'decimate': decimate,
+                   'decimate_threshold': decimate_threshold, 'retain_axes': retain_axes,
+                   'range_hysteresis': range_hysteresis, 'box': (self.x, self.y, self.w, self.h), 'xlim': self.xlim,
+                   'hover': hover and not offscreen}
+        # the state of the retained axes, that the frame hands back to .draw_frame()
+        options['axes ranges'], options['prepared axes'] = self.axes_ranges, self.prepared_axes
+        if background:
+            # the worker gets its own copy of the category tables and of the measured characters, it never calls
+            # into the sketch
+            options['categories'] = {axis: table.copy() for axis, table in self.categories.items()}
+            self.learn_characters(plots)
+            options['metrics'] = self.metrics.frozen()
+            frame = self.background_frame(plots, options, max_stale_frames)
+        else:
+            options['categories'] = self.categories
+            options['metrics'] = self.metrics
+            frame = self.prepare(plots, options)
 
-        multi_y = [plt['y axis'] == 1 for plt in self.plots]
+        if frame is not None:
+            self.draw_frame(p, frame)
+        if offscreen:
+            p.end_draw()
+            if to_py5image:
+                return p
+            self.s.image(p, self.x, self.y)
+
+    def take_plots(self, copy_streams=False):
+        """Hand over this frame's plots and the current data of all streams, the plot starts collecting anew"""
+        plots = self.plots
+        self.reset()
+        for series, entry in self.streams:
+            if entry['type'] == 'hist':
+                # only the values appended since the last frame are binned
+                hist = entry['histogram']
+                counts = hist.update()
+                if entry['density'] and counts.sum() > 0:
+                    counts = counts / (counts.sum() * np.diff(hist.edges))
+                plots.append(self.histogram_bars(counts, hist.edges, entry['color'], entry['y axis']))
+            elif entry['type'] == 'waterfall':
+                if len(series) > 0:
+                    xs = series.xs.view()
+                    plots.append({'xs': np.array([xs[0], xs[-1]]), 'ys': np.array(entry['extent']),
+                                  'categorical': False, 'type': 'waterfall', 'waterfall': series,
+                                  'parts': series.parts(), 'color': None, 'stroke weight': 1,
+                                  'y axis': entry['y axis']})
+            # streamed data joins this frame's plots as views into its buffers without copying. A background worker
+            # gets a copy, as the buffers are written to while it works
+            elif len(series) > 0:
+                # a series with a pyramid shows more points than the plot has pixel columns as the envelope of a
+                # coarser level. The plot's width is an upper bound of its inner width
+                detail = series.detail(*(self.xlim or (None, None)), pixels=self.w) if entry['type'] == 'lines' else None
+                if detail is not None:
+                    plots.append({**entry, 'xs': detail[0], 'ys': detail[1], 'sorted': True, 'decimate': None})
+                else:
+                    xs, ys = (np.array(series.xs), np.array(series.ys)) if copy_streams else (series.xs, series.ys)
+                    plots.append({**entry, 'xs': xs, 'ys': ys, 'sorted': series.sorted})
+        return plots
+
+    def learn_characters(self, plots):
+        """measure all characters of tick labels and categories in advance, so .prepare() never calls into the sketch"""
+        chars = '0123456789.-+einfa'
+        for table in self.categories.values():
+            chars += ''.join(map(str, table.labels))
+        for plt in plots:
+            if plt.get('order'):
+                chars += ''.join(map(str, plt['order']))
+        self.metrics.learn(chars)
+
+    def background_frame(self, plots, options, max_stale_frames=2):
+        """Double buffered preparation in a worker thread: while the worker prepares the newest submitted data, the
+        last completed frame is drawn. Data shown while the worker is still busy is skipped, later data supersedes it.
+        Returns the frame to draw or None."""
+        number = self.s.frame_count
+        submit = lambda: background_workers().submit(lambda: (number, self.prepare(plots, options)))
+        if self.pending is not None and self.pending.done():
+            self.ready, self.pending = self.pending.result(), None
+        if self.pending is None:
+            self.pending = submit()
+        while max_stale_frames is not None and self.staleness(number) > max_stale_frames:
+            # too far behind => block until the worker catches up with this frame's data
+            self.ready, self.pending = self.pending.result(), None
+            if self.staleness(number) > max_stale_frames:
+                self.pending = submit()
+        return self.ready[1] if self.ready is not None else None
+
+    def staleness(self, number):
+        """how many frames the ready background frame is behind the frame number"""
+        if self.ready is None:
+            return float('inf')
+        return number - self.ready[0]
+
+    def prepare(self, plots, options):
+        """Everything of .show() that doesn't draw: check and collect the ranges, lay out the plot, find the ticks and
+        compute the vertices of all plots. Only uses numpy and the text metrics of the options and doesn't change the
+        plot, so it can run in a background thread. Returns a frame dict for .draw_frame() or None if there is
+        nothing to draw."""
+        o = options
+        metrics = o['metrics']
+        ylimit, ylimit_1 = o['ylimit'], o['ylimit_1']
+        if o['xlim'] is not None:
+            plots = [self.cull(plt, o['xlim']) for plt in plots]
+        multi_y = [plt['y axis'] == 1 for plt in plots]
         multi_y = True if True in multi_y else False
-                
-        ylimits_as_minmax = [True if (ylimit[0] is not None) and (not autoscale_in_ylimits[0]) else False,
-                             True if (ylimit[1] is not None) and (not autoscale_in_ylimits[1]) else False]
-        
-        ylimits_as_minmax_1 = [True if (ylimit_1[0] is not None) and (not autoscale_in_ylimits_1[0]) else False,
-                               True if (ylimit_1[1] is not None) and (not autoscale_in_ylimits_1[1]) else False]
+
+        ylimits_as_minmax = [True if (ylimit[0] is not None) and (not o['autoscale_in_ylimits'][0]) else False,
+                             True if (ylimit[1] is not None) and (not o['autoscale_in_ylimits'][1]) else False]
+
+        ylimits_as_minmax_1 = [True if (ylimit_1[0] is not None) and (not o['autoscale_in_ylimits_1'][0]) else False,
+                               True if (ylimit_1[1] is not None) and (not o['autoscale_in_ylimits_1'][1]) else False]
 
 
         #-------------------------NUMERICAL OR CATEGORICAL Y AXIS-------------------------
 
         plotable = [True, True]
-        plots = [plt for plt in self.plots if plt['y axis'] == 0]
-        y_categorical, order, plotable[0] = self.check_categorical_numerical(plots)
+        plots_0 = [plt for plt in plots if plt['y axis'] == 0]
+        y_categorical, order, plotable[0] = self.check_categorical_numerical(plots_0)
 
         if multi_y:
-            plots_1 = [plt for plt in self.plots if plt['y axis'] == 1]
+            plots_1 = [plt for plt in plots if plt['y axis'] == 1]
             y_categorical_1, order_1, plotable[1] = self.check_categorical_numerical(plots_1)
-        
-        if False in plotable:
-            if to_py5image:
-                p.end_draw()
-                return p
-            return
 
-        #-------------------------COLLECT ALL XS AND YS-------------------------
-        
-        all_xs = np.array([])
-        if not y_categorical:
-            all_ys = np.array([])
-            for plt in plots:
-                # if ylimits exist, min/max out data points.
-                if ylimit[0] is not None:
-                    plt['ys'] = np.maximum(plt['ys'], ylimit[0])
-                    # could mask out these data points like this; but would need another plotable check for if all data is filtered out
-                    # mask = plt['ys'] >= ylimit[0]
-                    # plt['ys'] = plt['ys'][mask]
-                    # plt['xs'] = plt['xs'][mask]
-                if ylimit[1] is not None:
-                    plt['ys'] = np.minimum(plt['ys'], ylimit[1])
-                all_xs = np.append(all_xs, plt['xs'])
-                all_ys = np.append(all_ys, plt['ys'])           
-        else:
-            all_ys = []
-            for plt in plots:
-                all_ys.extend(plt['ys'])
-                all_xs = np.append(all_xs, plt['xs'])
+        if False in plotable:
+            return None
 
-        all_xs_1 = np.array([])
-        if multi_y:
-            if not y_categorical_1:
-                all_ys_1 = np.array([])
-                for plt in plots_1:
-                    if ylimit_1[0]:
-                        plt['ys'] = np.maximum(plt['ys'], ylimit_1[0])
-                    if ylimit_1[1]:
-                        plt['ys'] = np.minimum(plt['ys'], ylimit_1[1])
-                    all_xs_1 = np.append(all_xs_1, plt['xs'])
-                    all_ys_1 = np.append(all_ys_1, plt['ys'])
-            else:
-                all_ys_1 = []
-                for plt in plots_1:
-                    all_xs_1 = np.append(all_xs_1, plt['xs'])
-                    all_ys_1.extend(plt['ys'])
-
-        # test if data exists before continuing further
-        total_xs = np.concatenate((all_xs, all_xs_1))       
-        if total_xs.shape == (0,):
-            if empty_warning:
+        #-------------------------COLLECT RANGES-------------------------
+        # only the min and max of every series are needed => reduce the cached per series ranges instead of
+        # concatenating all data. ylimits are applied to the ranges here and to the coordinates when drawing.
+        x_range = self.reduce_ranges([self.data_range(plt, 'xs') for plt in plots])
+        if o['xlim'] is not None:
+            x_range = o['xlim']
+        if x_range is None:
+            if o['empty_warning']:
                 print('the plot data is empty')
-            self.reset()
-            if to_py5image:
-                p.end_draw()
-                return p
-            return
-        
-        min_all_xs = np.min(total_xs);    max_all_xs = np.max(total_xs)
-        if not y_categorical:
-            min_all_ys = np.min(all_ys);    max_all_ys = np.max(all_ys)
-            if ylimits_as_minmax[0]:
-                min_all_ys = ylimit[0]
-            if ylimits_as_minmax[1]:
-                max_all_ys = ylimit[1]
-        if multi_y and not y_categorical_1:
-            min_all_ys_1 = np.min(all_ys_1);    max_all_ys_1 = np.max(all_ys_1)
-            if ylimits_as_minmax_1[0]:
-                min_all_ys_1 = ylimit_1[0]
-            if ylimits_as_minmax_1[1]:
-                max_all_ys_1 = ylimit_1[1]
-
-        #-------------------------CALC DIMENSIONS-------------------------
-        p.no_fill();  p.stroke(255)
-        p.stroke_weight(1);  p.text_size(14)
+            return None
+        min_all_xs, max_all_xs = x_range
 
+        categories = o['categories']
         if y_categorical:
-            widest_y_label = p.text_width(max(all_ys, key=len))
+            all_ys = categories[0].labels
         else:
-            decimals, form = self.find_decimals(min_all_ys, max_all_ys, decimals=y_decimals)
-            widest_y_label = max(p.text_width(f'{min_all_ys:.{decimals}{form}}'),
-                                 p.text_width(f'{max_all_ys:.{decimals}{form}}'))
-        
-        text_height = p.text_ascent() + p.text_descent()
-        up_extra = text_height if title else 0
-        left_extra = text_height + widest_y_label if ylabel else widest_y_label
-        bottom_extra = text_height if xlabel else 0
-        right_extra = 0
-
+            min_all_ys, max_all_ys = self.y_range(plots_0, ylimit, ylimits_as_minmax)
         if multi_y:
             if y_categorical_1:
-                widest_y_label_1 = p.text_width(max(all_ys_1, key=len))
+                all_ys_1 = categories[1].labels
             else:
-                decimals_1, form_1 = self.find_decimals(min_all_ys_1, max_all_ys_1, decimals=y_decimals_1)
-                widest_y_label_1 = max(p.text_width(f'{min_all_ys_1:.{decimals_1}{form_1}}'),
-                                       p.text_width(f'{max_all_ys_1:.{decimals_1}{form_1}}'))
-            right_extra += widest_y_label_1 + 2
+                min_all_ys_1, max_all_ys_1 = self.y_range(plots_1, ylimit_1, ylimits_as_minmax_1)
 
-        self.calc_dimensions(up_extra=up_extra, left_extra=left_extra, bottom_extra=bottom_extra, 
-                             right_extra=right_extra, to_graphics=to_py5image)    
+        #-------------------------RETAINED AXES-------------------------
+        ranges = [[min_all_xs, max_all_xs], [min_all_ys, max_all_ys] if not y_categorical else None,
+                  [min_all_ys_1, max_all_ys_1] if multi_y and not y_categorical_1 else None]
+        axes_ranges = o['axes ranges']
+        if o['retain_axes'] and o['range_hysteresis'] > 0:
+            if axes_ranges is not None:
+                ranges = [self.hysteresis(new, old, o['range_hysteresis']) for new, old in zip(ranges, axes_ranges)]
+                min_all_xs, max_all_xs = ranges[0]
+                if ranges[1] is not None:
+                    min_all_ys, max_all_ys = ranges[1]
+                if ranges[2] is not None:
+                    min_all_ys_1, max_all_ys_1 = ranges[2]
+            axes_ranges = ranges
+        x_range = (min_all_xs, max_all_xs)
+        axes_key = None
+        if o['retain_axes']:
+            labels = (tuple(all_ys) if y_categorical else None, tuple(order) if order else None,
+                      tuple(all_ys_1) if multi_y and y_categorical_1 else None,
+                      tuple(order_1) if multi_y and y_categorical_1 and order_1 else None)
+            axes_key = (tuple(map(tuple, filter(None, ranges))), labels, o['x_decimals'], o['y_decimals'],
+                        o['y_decimals_1'], o['box'], o['title'], o['xlabel'], o['ylabel'], o['show_outline'],
+                        o['show_helper_lines'], o['to_py5image'])
 
-        #-------------------------FIND TICKS-------------------------
-        total_xs = np.concatenate((all_xs, all_xs_1))
-        xticks = self.tick_pos_labels(p, total_xs, self.xii, self.rii, decimals=x_decimals)
-        
-        ylookup, ylookup_1 = None, None
-        min_max_y = [min_all_ys if ylimits_as_minmax[0] else None, max_all_ys if ylimits_as_minmax[1] else None]
-        if y_categorical:
-            yticks, ylookup = self.tick_pos_labels_categorical(all_ys, self.yii, self.bii, horizontal=False, order=order)
+        prepared_axes = o['prepared axes']
+        if axes_key is not None and prepared_axes[0] == axes_key:
+            # unchanged axes => the layout and ticks of the previous frame still apply
+            axes = prepared_axes[1]
         else:
-            yticks = self.tick_pos_labels(p, all_ys, self.yii, self.bii, horizontal=False, decimals=y_decimals, ylimit=min_max_y)
-        
+            #-------------------------CALC DIMENSIONS-------------------------
+            if y_categorical:
+                widest_y_label = max(metrics.widths(all_ys + list(order or []) + ['']))
+            else:
+                decimals, form = self.find_decimals(min_all_ys, max_all_ys, decimals=o['y_decimals'])
+                widest_y_label = max(self.label_width(min_all_ys, decimals, form, metrics),
+                                     self.label_width(max_all_ys, decimals, form, metrics))
+
+            text_height = metrics.height
+            up_extra = text_height if o['title'] else 0
+            left_extra = text_height + widest_y_label if o['ylabel'] else widest_y_label
+            bottom_extra = text_height if o['xlabel'] else 0
+            right_extra = 0
+
+            if multi_y:
+                if y_categorical_1:
+                    widest_y_label_1 = max(metrics.widths(all_ys_1 + list(order_1 or []) + ['']))
+                else:
+                    decimals_1, form_1 = self.find_decimals(min_all_ys_1, max_all_ys_1, decimals=o['y_decimals_1'])
+                    widest_y_label_1 = max(self.label_width(min_all_ys_1, decimals_1, form_1, metrics),
+                                           self.label_width(max_all_ys_1, decimals_1, form_1, metrics))
+                right_extra += widest_y_label_1 + 2
+
+            dims = self.layout(o['box'], up_extra=up_extra, left_extra=left_extra, bottom_extra=bottom_extra,
+                               right_extra=right_extra, to_graphics=o['to_py5image'])
+
+            #-------------------------FIND TICKS-------------------------
+            xticks = self.tick_pos_labels(None, min_all_xs, max_all_xs, dims['xii'], dims['rii'],
+                                          decimals=o['x_decimals'], metrics=metrics)
+
+            ylookup, ylookup_1, yticks_1 = None, None, None
+            if y_categorical:
+                yticks, ylookup = self.tick_pos_labels_categorical(categories[0], dims['yii'], dims['bii'],
+                                                                   horizontal=False, order=order)
+            else:
+                yticks = self.tick_pos_labels(None, min_all_ys, max_all_ys, dims['yii'], dims['bii'],
+                                              horizontal=False, decimals=o['y_decimals'], metrics=metrics)
+
+            if multi_y:
+                if y_categorical_1:
+                    yticks_1, ylookup_1 = self.tick_pos_labels_categorical(categories[1], dims['yii'], dims['bii'],
+                                                                           horizontal=False, order=order_1)
+                else:
+                    yticks_1 = self.tick_pos_labels(None, min_all_ys_1, max_all_ys_1, dims['yii'], dims['bii'],
+                                                    horizontal=False, decimals=o['y_decimals_1'], metrics=metrics)
+
+            axes = {'dims': dims, 'xticks': xticks, 'yticks': yticks, 'yticks 1': yticks_1,
+                    'text height': text_height, 'lookups': (ylookup, ylookup_1)}
+            if axes_key is not None:
+                prepared_axes = (axes_key, axes)
+
+        #-------------------------PLOT VERTICES-------------------------
+        dims, (ylookup, ylookup_1) = axes['dims'], axes['lookups']
+        items = []
         if multi_y:
-            min_max_y_1 = [min_all_ys_1 if ylimits_as_minmax_1[0] else None, max_all_ys_1 if ylimits_as_minmax_1[1] else None]
             if y_categorical_1:
-                yticks_1, ylookup_1 = self.tick_pos_labels_categorical(all_ys_1, self.yii, self.bii, horizontal=False, order=order_1)
+                y_info = {'categorical': True, 'lookup': ylookup_1, 'labels': categories[1].labels}
             else:
-                yticks_1 = self.tick_pos_labels(p, all_ys_1, self.yii, self.bii, horizontal=False, decimals=y_decimals_1, ylimit=min_max_y_1)
+                y_info = {'categorical': False, 'min': min_all_ys_1, 'max': max_all_ys_1, 'limit': ylimit_1}
+            items += self.prepare_plots(plots_1, x_range, y_info, dims, o['decimate'], o['decimate_threshold'])
+        if y_categorical:
+            y_info = {'categorical': True, 'lookup': ylookup, 'labels': categories[0].labels}
+        else:
+            y_info = {'categorical': False, 'min': min_all_ys, 'max': max_all_ys, 'limit': ylimit}
+        items += self.prepare_plots(plots_0, x_range, y_info, dims, o['decimate'], o['decimate_threshold'])
+
+        return {'axes': axes, 'axes key': axes_key, 'items': items, 'options': o, 'x range': x_range,
+                'axes ranges': axes_ranges, 'prepared axes': prepared_axes}
 
+    def draw_frame(self, p, frame):
+        """Draw the axes and plots of a frame from .prepare()"""
+        o, axes = frame['options'], frame['axes']
+        # the frame's layout and retained axes state become the plot's current ones
+        self.apply_dims(axes['dims'])
+        self.shown_x_range = frame['x range']
+        self.axes_ranges, self.prepared_axes = frame['axes ranges'], frame['prepared axes']
+
+        p.no_fill();  p.stroke(255)
+        p.stroke_weight(1);  p.text_size(14)
+
+        axes_args = (axes['xticks'], axes['yticks'], axes['yticks 1'], axes['text height'], o['title'], o['xlabel'],
+                     o['ylabel'], o['show_outline'], o['show_helper_lines'])
+        if o['retain_axes']:
+            if frame['axes key'] != self.axes_key:
+                self.axes_key = frame['axes key']
+                if self.axes_layer is None:
+                    self.axes_layer = graphics_pool(self.s).acquire(self.w, self.h)
+                g = self.axes_layer
+                g.begin_draw()
+                g.clear()
+                g.no_fill();  g.stroke(255)
+                g.stroke_weight(1);  g.text_size(14)
+                # the layer covers only the plot's area, but the axes are drawn in plot coordinates
+                g.translate(-self.origin[0], -self.origin[1])
+                self.draw_axes(g, *axes_args)
+                g.end_draw()
+            p.image(self.axes_layer, *self.origin)
+        else:
+            self.draw_axes(p, *axes_args)
+
+        if o['xlim'] is not None:
+            # data beyond the viewport, like the points continuing graphs to the edges, is cut off at the plot's frame
+            p.clip(self.xi, self.yi, self.wi, self.hi)
+        self.draw_plots(p, frame['items'])
+        if o['xlim'] is not None:
+            p.no_clip()
+        if o['hover'] and self.mouse_over():
+            self.draw_hover(p, frame)
+
+    def hover_targets(self, frame) -> list:
+        """(item, index) of every drawn item with points, the index is None for ascending xs that are searched with
+        a binary search. Built once per frame, only when the frame is hovered."""
+        if self.hovered[0] is not frame:
+            targets = []
+            for item in frame['items']:
+                if 'points' not in item:
+                    continue
+                xcoords, ycoords = item['points'][:2]
+                plt = item['plt']
+                if plt['type'] in ('lines', 'bars') and np.ndim(plt['ys']) == 1 and \
+                   (plt['sorted'] if 'sorted' in plt else is_sorted(xcoords)):
+                    targets.append((item, None))
+                else:
+                    targets.append((item, GridIndex(xcoords, ycoords, cell=16)))
+            self.hovered = (frame, targets)
+        return self.hovered[1]
+
+    def nearest_point(self, frame, x, y, radius=20):
+        """(distance, item, index) of the drawn point closest to x, y. Scatter points count within radius,
+        graphs and bars by the point closest in x."""
+        best = None
+        for item, index in self.hover_targets(frame):
+            xcoords, ycoords = item['points'][:2]
+            i = nearest_sorted(xcoords, x) if index is None else index.nearest(x, y, radius)
+            if i is None:
+                continue
+            dist = np.hypot(xcoords[i] - x, ycoords[i] - y)
+            if best is None or dist < best[0]:
+                best = (dist, item, i)
+        return best
+
+    def draw_hover(self, p, frame):
+        """Draw a crosshair on the data point closest to the mouse and a tooltip with its values"""
+        hit = self.nearest_point(frame, *self.mouse_xy())
+        if hit is None:
+            return
+        _, item, i = hit
+        xcoords, ycoords, xs, ys = item['points']
+        px, py = xcoords[i], ycoords[i]
+        y_text = item['y labels'][ys[i]] if item['y labels'] is not None else f'{ys[i]:.4g}'
+        label = f'{xs[i]:.4g}, {y_text}'
+        with p.push_style():
+            p.stroke(255, 120);     p.stroke_weight(1)
+            p.line(px, self.yi, px, self.bi)
+            p.line(self.xi, py, self.ri, py)
+            p.no_fill();    p.stroke(255)
+            p.circle(px, py, 9)
+            # keep the tooltip within the plot's frame
+            w, h = self.metrics.width(label) + 10, self.metrics.height + 6
+            tx = px + 10 if px + 10 + w <= self.ri else px - 10 - w
+            ty = py - 10 - h if py - 10 - h >= self.yi else py + 10
+            p.fill(0);  p.rect(tx, ty, w, h)
+            p.fill(255)
+            p.text_align(p.LEFT, p.TOP)
+            p.text(label, tx + 5, ty + 3)
+
+    def draw_axes(self, p, xticks, yticks, yticks_1, text_height, title=None, xlabel=None, ylabel=None,
+                  show_outline=False, show_helper_lines=False):
+        """Draw the title, axis labels, plot frame and ticks"""
+        x, y = self.origin
         #-------------------------DRAW TEXT-------------------------
         with p.push_style():
             p.text_align(p.CENTER, p.CENTER)
@@ -355,18 +959,18 @@ class Plot:
             if title:
                 with p.push_style():
                     p.text_size(16)
-                    p.text(title, (self.x + (self.x + self.w))/2, self.y+ text_height/2)
+                    p.text(title, (x + (x + self.w))/2, y+ text_height/2)
             if xlabel:
-                p.text(xlabel, (self.xi + self.ri)/2, (self.y+self.h) - text_height)
+                p.text(xlabel, (self.xi + self.ri)/2, (y+self.h) - text_height)
             if ylabel:
                 with p.push_matrix():
-                    p.translate(self.x + text_height/2, (self.y + (self.y+self.h))/2)
+                    p.translate(x + text_height/2, (y + (y+self.h))/2)
                     p.rotate(-p.HALF_PI)
                     p.text(ylabel, 0, 0)
         
         #-------------------------DRAW PLOT FRAME-------------------------
         if show_outline:
-            p.rect(self.x, self.y, self.w-1, self.h-1)
+            p.rect(x, y, self.w-1, self.h-1)
         if show_helper_lines:
                 p.rect(self.xii, self.yii, self.wii, self.hii)
         p.rect(self.xi, self.yi, self.wi, self.hi)
@@ -381,116 +985,375 @@ class Plot:
             p.text_align(p.RIGHT, p.CENTER)
             for yt in yticks:
                 p.line(self.xi, yt[0], self.xi-5, yt[0])
-                p.text(yt[1], self.xi -10, yt[0] - p.text_descent())
-            if multi_y:
+                p.text(yt[1], self.xi -10, yt[0] - self.metrics.descent)
+            if yticks_1 is not None:
                 p.text_align(p.LEFT, p.CENTER)
                 for yt in yticks_1:
                     p.line(self.ri, yt[0], self.ri+5, yt[0])
-                    p.text(yt[1], self.ri +10, yt[0] - p.text_descent())
-
-        #-------------------------DRAW PLOTS-------------------------
-        
-        if multi_y:
-            y_info = {'categorical': True, 'lookup': ylookup_1} if y_categorical_1 else \
-                     {'categorical': False, 'min': min_all_ys_1, 'max': max_all_ys_1}
-            self.draw_plots(p, plots_1, min_all_xs, max_all_xs, y_info)
-        y_info = {'categorical': True, 'lookup': ylookup} if y_categorical else \
-                 {'categorical': False, 'min': min_all_ys, 'max': max_all_ys}
-        self.draw_plots(p, plots, min_all_xs, max_all_xs, y_info)
-
-        self.reset()
-        if to_py5image:
-            p.end_draw()
-            return p
+                    p.text(yt[1], self.ri +10, yt[0] - self.metrics.descent)
 
-    def draw_plots(self, p, plots, min_all_xs, max_all_xs, y_info):
-        """Draw all provided plots. """
+    def prepare_plots(self, plots, x_range, y_info, dims, decimate=True, decimate_threshold=None):
+        """The vertices and per vertex colors to draw the provided plots with, computed with numpy only"""
+        min_all_xs, max_all_xs = x_range
+        if decimate_threshold is None:
+            decimate_threshold = 4 * dims['wii']
+        y_info = {**y_info, 'top': dims['yii'], 'bottom': dims['bii']}
         if y_info['categorical']:
-            get_y_coords = lambda ys: [y_info['lookup'][y] for y in ys]
+            # ys are category codes => one fancy index into the positions of all codes
+            get_y_coords = lambda ys: y_info['lookup'][ys]
         else:
-            get_y_coords = lambda ys: remap(ys, y_info['min'], y_info['max'], self.bii, self.yii)
-            # ! processing y coords are inverted
+            get_y_coords = lambda ys: self.y_coords(ys, y_info)
 
+        items = []
         for plt in plots:
             xs = plt['xs']
             ys = plt['ys']
+            argb = self.per_point_colors(plt) if plt.get('render') != 'density' else None
             #-------------------------VLINES-------------------------
             if plt['type'] == 'vlines':
-                xcoords = remap(xs, min_all_xs, max_all_xs, self.xii, self.rii)
-                
-                with p.push_style():
-                    set_stroke = self.create_stroke_function(plt, p)
-                    p.stroke_weight(plt['stroke weight'])
-                    for i in range(xs.shape[0]):
-                        set_stroke(i)
-                        p.line(xcoords[i], self.yii, xcoords[i], self.bii,)
+                xcoords = remap(xs, min_all_xs, max_all_xs, dims['xii'], dims['rii'])
+
+                verts = np.empty((2*xcoords.shape[0], 2))
+                verts[0::2, 0] = xcoords;   verts[0::2, 1] = dims['yii']
+                verts[1::2, 0] = xcoords;   verts[1::2, 1] = dims['bii']
+                items.append({'plt': plt, 'kind': 'lines', 'verts': verts,
+                              'argb': np.repeat(argb, 2) if argb is not None else None})
 
             #-------------------------SCATTER-------------------------
             if plt['type'] == 'scatter':
-                xcoords = remap(xs, min_all_xs, max_all_xs, self.xii, self.rii)
+                xcoords = remap(xs, min_all_xs, max_all_xs, dims['xii'], dims['rii'])
                 ycoords = get_y_coords(ys)
-
-                with p.push_style():
+                if plt.get('render') == 'density':
+                    items.append(self.density_item(plt, xcoords, ycoords, dims))
+                else:
                     # TODO: If plt['labels'] != None: make a lookup dictionary with a rand bright color for each
                     # unique label - use list(set(labels)) to get uniques and provide the lookup as set_fill
-                    if plt['marker'] == 'circle':
-                        set_fill = self.create_fill_function(plt, p)
-                        p.no_stroke()
-                        for i in range(xs.shape[0]):
-                            set_fill(i)
-                            p.circle(xcoords[i], ycoords[i], plt['diameter'])
-                    elif plt['marker'] == 'line':
-                        set_stroke = self.create_stroke_function(plt, p)
-                        p.stroke_weight(plt['stroke weight'])
-                        for i in range(xs.shape[0]):
-                            set_stroke(i)
-                            p.line(xcoords[i], ycoords[i] -5, xcoords[i], ycoords[i] +5)
-                    elif plt['marker'] == 'cross':
-                        set_stroke = self.create_stroke_function(plt, p)
-                        p.stroke_weight(plt['stroke weight'])
-                        for i in range(xs.shape[0]):
-                            set_stroke(i)
-                            p.line(xcoords[i] -3, ycoords[i] -3, xcoords[i] +3, ycoords[i] +3)
-                            p.line(xcoords[i] -3, ycoords[i] +3, xcoords[i] +3, ycoords[i] -3)
-                    elif plt['marker'] == 'square':
-                        set_fill = self.create_fill_function(plt, p)
-                        p.no_stroke()
-                        p.rect_mode(p.CENTER)
-                        for i in range(xs.shape[0]):
-                            set_fill(i)
-                            p.rect(xcoords[i], ycoords[i], plt['diameter'], plt['diameter'])
-                    elif plt['marker'] == 'triangle':
-                        set_fill = self.create_fill_function(plt, p)
-                        p.no_stroke()
-                        p.rect_mode(p.CENTER)
-                        for i in range(xs.shape[0]):
-                            set_fill(i)
-                            p.triangle(xcoords[i]-3, ycoords[i]+3, xcoords[i], ycoords[i]-3, xcoords[i]+3, ycoords[i]+3,)
-                    else:
-                        # The marker is a custom character/text
-                        set_fill = self.create_fill_function(plt, p)
-                        p.no_stroke()
-                        p.text_align(p.CENTER, p.CENTER)
-                        for i in range(xs.shape[0]):
-                            set_fill(i)
-                            p.text(plt['marker'], xcoords[i], ycoords[i])            
+                    items.append(self.marker_item(plt, xcoords, ycoords, argb))
+                    # screen and data coordinates of the drawn points, for .show(hover=True)
+                    items[-1]['points'] = (xcoords, ycoords, xs, ys)
+
+            #-------------------------BARS-------------------------
+            if plt['type'] == 'bars':
+                lefts = remap(xs - plt['half width'], min_all_xs, max_all_xs, dims['xii'], dims['rii'])
+                rights = remap(xs + plt['half width'], min_all_xs, max_all_xs, dims['xii'], dims['rii'])
+                # all bars are a single shape of two triangles per bar
+                verts = quads(lefts, get_y_coords(plt['bottom']), rights, get_y_coords(ys))
+                items.append({'plt': plt, 'kind': 'triangles', 'verts': verts,
+                              'argb': np.repeat(argb, 6) if argb is not None else None,
+                              'points': (remap(xs, min_all_xs, max_all_xs, dims['xii'], dims['rii']),
+                                         get_y_coords(ys), xs, ys)})
+
+            #-------------------------HEATMAPS-------------------------
+            if plt['type'] in ('heatmap', 'waterfall'):
+                left, right = remap(xs, min_all_xs, max_all_xs, dims['xii'], dims['rii'])
+                bottom, top = get_y_coords(ys)
+                rect = (left, top, right - left, bottom - top)
+                if plt['type'] == 'heatmap':
+                    pixels = shade(plt['values'], plt['colormap'], plt['log scale'], plt['value range'])
+                    items.append({'plt': plt, 'kind': 'image', 'verts': rect, 'pixels': pixels, 'argb': None})
+                else:
+                    # the waterfall's pixels are uploaded when drawing, only the parts to draw are prepared
+                    items.append({'plt': plt, 'kind': 'waterfall', 'verts': rect, 'parts': plt['parts'],
+                                  'argb': None})
 
             #-------------------------GRAPH-------------------------
-            if plt['type'] == 'lines':
+            if plt['type'] == 'lines' and np.ndim(ys) == 2:
+                if xs.shape[0] > 1:
+                    items.append(self.channels_item(plt, x_range, y_info, dims, decimate, decimate_threshold))
+            elif plt['type'] == 'lines':
                 if xs.shape != (1,):
                     # at shape == (1,) there are not enough points to draw a line
-                    xcoords = remap(xs, min_all_xs, max_all_xs, self.xii, self.rii)
-                    ycoords = get_y_coords(ys)   
+                    idx = None
+                    if decimate and plt.get('decimate') and not y_info['categorical']:
+                        idx = self.decimation_indices(plt, x_range, dims['wii'], decimate_threshold)
+                    if idx is not None:
+                        xs, ys = xs[idx], ys[idx]
+                    xcoords = remap(xs, min_all_xs, max_all_xs, dims['xii'], dims['rii'])
+                    ycoords = get_y_coords(ys)
+
+                    coords = np.column_stack((xcoords, ycoords))
+                    if argb is None:
+                        # a single color => the whole series is one open polyline shape
+                        items.append({'plt': plt, 'kind': 'polyline', 'verts': coords, 'argb': None})
+                    else:
+                        if idx is not None:
+                            argb = argb[idx]
+                        # like with p.line() per segment, each segment takes the color of its end point
+                        items.append({'plt': plt, 'kind': 'lines', 'verts': segments(coords),
+                                      'argb': np.repeat(argb[1:], 2)})
+                    items[-1]['points'] = (xcoords, ycoords, xs, ys)
+        for item in items:
+            if 'points' in item:
+                item['y labels'] = y_info.get('labels')
+        return items
+
+    def channels_item(self, plt, x_range, y_info, dims, decimate=True, decimate_threshold=None):
+        """All channels of a plot with 2D ys as one batch of line segments. The shared xs are remapped once and
+        broadcast to all channels, the ys of all channels are remapped by a single operation."""
+        xs, ys = plt['xs'], plt['ys']
+        if decimate and plt.get('decimate') and xs.shape[0] > decimate_threshold:
+            if 'sorted' not in plt:
+                plt['sorted'] = is_sorted(xs)
+            if plt['sorted']:
+                # every channel keeps its own min and max points per pixel column => xs become 2D as well
+                xs, ys = minmax_2d(xs, ys, max(int(dims['wii']), 1), x_range)
+        xcoords = np.broadcast_to(remap(xs, *x_range, dims['xii'], dims['rii']), ys.shape)
+        ycoords = self.y_coords(ys + plt['offsets'][:, None], y_info)
+
+        # the segments of all channels: [channel, segment, start or end, x or y]
+        verts = np.empty((ys.shape[0], ys.shape[1] - 1, 2, 2))
+        verts[:, :, 0, 0] = xcoords[:, :-1];    verts[:, :, 0, 1] = ycoords[:, :-1]
+        verts[:, :, 1, 0] = xcoords[:, 1:];     verts[:, :, 1, 1] = ycoords[:, 1:]
+        argb = self.per_point_colors(plt)
+        if argb is not None:
+            # one color per channel
+            argb = np.repeat(argb, 2 * (ys.shape[1] - 1))
+        return {'plt': plt, 'kind': 'lines', 'verts': verts.reshape(-1, 2), 'argb': argb,
+                'points': (xcoords.ravel(), ycoords.ravel(), np.broadcast_to(xs, ys.shape).ravel(), ys.ravel())}
+
+    def draw_plots(self, p, items):
+        """Draw the prepared vertices of all plots, one shape per plot"""
+        shapes = {'polyline': None, 'lines': p.LINES, 'triangles': p.TRIANGLES}
+        images = 0
+        for item in items:
+            plt, argb = item['plt'], item['argb']
+            with p.push_style():
+                if item['kind'] == 'image':
+                    self.draw_image(p, item, images)
+                    images += 1
+                elif item['kind'] == 'waterfall':
+                    self.draw_waterfall(p, item)
+                elif item['kind'] == 'glyphs':
+                    self.draw_glyphs(p, plt, item['verts'], argb)
+                elif item['kind'] == 'triangles':
+                    p.no_stroke()
+                    if argb is None:
+                        self.create_fill_function(plt, p)(0)
+                    draw_vertices(p, p.TRIANGLES, item['verts'], argb, stroke=False)
+                else:
+                    p.no_fill()
+                    p.stroke_weight(plt['stroke weight'])
+                    if argb is None:
+                        self.create_stroke_function(plt, p)(0)
+                    draw_vertices(p, shapes[item['kind']], item['verts'], argb, stroke_weight=plt['stroke weight'])
+
+    def cull(self, plt, xlim):
+        """A copy of the plot dict with only the data within the xlim, as views where possible. Sorted xs are
+        searched with np.searchsorted instead of compared, so the cost only depends on the visible points. Graphs
+        keep one point on each side, so they continue to the edges of the plot."""
+        if plt['type'] in ('heatmap', 'waterfall'):
+            # drawn as a whole and cut off at the frame
+            return plt
+        xs = plt['xs']
+        left, right = xlim
+        if plt['type'] == 'bars':
+            keep = (xs + plt['half width'] >= left) & (xs - plt['half width'] <= right)
+        else:
+            if 'sorted' not in plt:
+                plt['sorted'] = is_sorted(xs)
+            if plt['sorted']:
+                start = int(np.searchsorted(xs, left, side='left'))
+                end = int(np.searchsorted(xs, right, side='right'))
+                if plt['type'] == 'lines':
+                    start, end = max(start - 1, 0), min(end + 1, xs.shape[0])
+                keep = slice(start, end)
+            else:
+                keep = (xs >= left) & (xs <= right)
+        culled = {key: value for key, value in plt.items() if key not in ('xs range', 'ys range')}
+        # every per point array is cut the same way as the xs, the channels of 2D ys along their samples
+        for key in ('xs', 'ys', 'half width', 'bottom', 'diameter'):
+            if np.ndim(plt.get(key)) in (1, 2) and np.shape(plt[key])[-1] == xs.shape[0]:
+                culled[key] = np.asarray(plt[key])[..., keep]
+        if 'argb' in plt:
+            culled['argb'] = plt['argb'][keep]
+        elif plt['color'] is not None and not self.is_number(plt['color'][0]) and np.ndim(plt['ys']) != 2:
+            # only the colors of the visible points are converted
+            colors = plt['color']
+            if isinstance(colors, np.ndarray) or isinstance(keep, slice):
+                colors = colors[keep]
+            else:
+                colors = [colors[i] for i in np.flatnonzero(keep)]
+            culled['argb'] = colors_to_argb(colors) if len(colors) > 0 else np.zeros(0, dtype=np.int32)
+        return culled
+
+    def decimation_indices(self, plt, x_range, pixels, threshold):
+        """Indices reducing a graph with more points than threshold to about 2 points per pixel column of the inner
+        plot, or None if all points should be drawn"""
+        xs, ys = plt['xs'], plt['ys']
+        if xs.shape[0] <= threshold:
+            return None
+        if 'sorted' not in plt:
+            plt['sorted'] = is_sorted(xs)
+        if not plt['sorted']:
+            # the buckets of unsorted xs wouldn't be contiguous runs of points => draw all points
+            return None
+        return decimate_indices(xs, ys, pixels, method=plt['decimate'], x_range=x_range)
+
+    def data_range(self, plt, key):
+        """(min, max) of a series' 'xs' or 'ys', computed once and cached with the series. None for no data"""
+        cache_key = key + ' range'
+        if cache_key not in plt:
+            data = plt[key]
+            if key == 'ys' and np.ndim(data) == 2:
+                # the channels of a 2D plot are shifted by their offsets
+                offsets = plt['offsets']
+                if data.size == 0:
+                    plt[cache_key] = None
+                else:
+                    lows, highs = data.min(axis=1), data.max(axis=1)
+                    if np.isnan(lows).any() or np.isnan(highs).any():
+                        # channels with NaNs => the slower NaN aware search, channels of only NaNs stay NaN
+                        with warnings.catch_warnings():
+                            warnings.simplefilter('ignore', RuntimeWarning)
+                            lows, highs = np.nanmin(data, axis=1), np.nanmax(data, axis=1)
+                    lows, highs = value_range(lows + offsets), value_range(highs + offsets)
+                    plt[cache_key] = None if lows is None else (lows[0], highs[1])
+            else:
+                plt[cache_key] = value_range(np.asarray(data))
+        return plt[cache_key]
+
+    def reduce_ranges(self, ranges):
+        """combine (min, max) ranges of several series, ignoring series without data"""
+        ranges = [r for r in ranges if r is not None]
+        if len(ranges) == 0:
+            return None
+        return min(r[0] for r in ranges), max(r[1] for r in ranges)
+
+    def y_range(self, plots, ylimit, ylimits_as_minmax):
+        """the numerical y range of all plots of an axis with its ylimits applied"""
+        y_range = self.reduce_ranges([self.data_range(plt, 'ys') for plt in plots])
+        if y_range is None:
+            # i.e. only vlines on this axis
+            y_range = (0, 1)
+        # clamping the range gives the same min and max as clamping every data point
+        minn, maxn = [self.clamp(v, ylimit) for v in y_range]
+        if ylimits_as_minmax[0]:
+            minn = ylimit[0]
+        if ylimits_as_minmax[1]:
+            maxn = ylimit[1]
+        return minn, maxn
+
+    def clamp(self, value, limit):
+        if limit[0] is not None:
+            value = max(value, limit[0])
+        if limit[1] is not None:
+            value = min(value, limit[1])
+        return value
+
+    def y_coords(self, ys, y_info):
+        """remap numerical ys to pixel coordinates, clamping values outside of the ylimit to its edges"""
+        # ! processing y coords are inverted
+        minn, maxn, bii, yii = y_info['min'], y_info['max'], y_info['bottom'], y_info['top']
+        coords = remap(np.asarray(ys, dtype=np.float64), minn, maxn, bii, yii)
+        lower, upper = y_info.get('limit', (None, None))
+        if lower is not None or upper is not None:
+            top = remap(upper, minn, maxn, bii, yii) if upper is not None else None
+            bottom = remap(lower, minn, maxn, bii, yii) if lower is not None else None
+            # coords is already a new array => clip in place without another copy
+            np.clip(coords, top, bottom, out=coords)
+        return coords
 
-                    with p.push_style():
-                        set_stroke = self.create_stroke_function(plt, p)
-                        p.stroke_weight(plt['stroke weight'])
-                        for i in range(1, xs.shape[0]):
-                            set_stroke(i)
-                            p.line(xcoords[i-1], ycoords[i-1], xcoords[i], ycoords[i],)
+    def hysteresis(self, new, old, tolerance):
+        """keep the old [min, max] range if the new range fits within it and isn't much smaller"""
+        if new is None or old is None:
+            return new
+        new_span = new[1] - new[0]
+        if old[0] <= new[0] and new[1] <= old[1] and (old[1] - old[0]) <= new_span * (1 + tolerance):
+            return old
+        return new
+
+    def marker_item(self, plt, xcoords, ycoords, argb):
+        """Stamp the scatter's marker onto all points, to be drawn as a single shape. The diameter= of circle and
+        square markers can also be an array with one diameter per point."""
+        if plt['marker'] in MARKERS:
+            kind, template, scales = MARKERS[plt['marker']]
+            verts = stamp(template, xcoords, ycoords, plt['diameter'] if scales else None)
+            if argb is not None:
+                argb = np.repeat(argb, template.shape[0])
+            return {'plt': plt, 'kind': kind, 'verts': verts, 'argb': argb}
+        # a custom character/text marker needs its glyph texture from the sketch => stamped when drawing
+        return {'plt': plt, 'kind': 'glyphs', 'verts': np.column_stack((xcoords, ycoords)), 'argb': argb}
+
+    def density_item(self, plt, xcoords, ycoords, dims):
+        """Count the points per pixel of the inner plot with a single bincount and color the counts with the
+        scatter's colormap. Empty pixels stay transparent."""
+        w, h = max(int(dims['wii']), 1), max(int(dims['hii']), 1)
+        cols = np.floor(xcoords - dims['xii'])
+        rows = np.floor(ycoords - dims['yii'])
+        # points on the right and bottom edge belong to the last pixel, anything else outside or nan is left out
+        cols[cols == w] = w - 1;    rows[rows == h] = h - 1
+        inside = (cols >= 0) & (cols < w) & (rows >= 0) & (rows < h)
+        cells = rows[inside].astype(np.intp) * w + cols[inside].astype(np.intp)
+        counts = np.bincount(cells, minlength=w*h).reshape(h, w)
+        pixels = shade(counts, plt['colormap'], log=plt['log scale'])
+        pixels[counts == 0, 0] = 0
+        return {'plt': plt, 'kind': 'image', 'verts': (dims['xii'], dims['yii']), 'pixels': pixels, 'argb': None}
+
+    def draw_image(self, p, item, i):
+        """Draw the pixels of an image item, reusing the plot's i-th image of the previous frame if it has the same size.
+        The image is placed at the item's (x, y) or stretched over its (x, y, w, h)."""
+        pixels = item['pixels']
+        img = self.images.get(i)
+        if img is not None and (img.width, img.height) == (pixels.shape[1], pixels.shape[0]):
+            img = self.s.create_image_from_numpy(pixels, bands='ARGB', dst=img)
+        else:
+            img = self.s.create_image_from_numpy(pixels, bands='ARGB')
+        self.images[i] = img
+        p.image(img, *item['verts'])
+
+    def draw_waterfall(self, p, item):
+        """Draw the columns of a waterfall from the oldest to the newest, as up to two parts of its circular buffer"""
+        waterfall = item['plt']['waterfall']
+        img = waterfall.py5image(self.s)
+        x, y, w, h = item['verts']
+        count = sum(n for _, n in item['parts'])
+        for first, n in item['parts']:
+            part_w = w * n / count
+            p.image(img, x, y, part_w, h, first, 0, first + n, waterfall.bins)
+            x += part_w
+
+    def draw_glyphs(self, p, plt, points, argb):
+        """Stamp a once rendered glyph texture of the marker character/text, tinted once per color"""
+        if not is_gl(p):
+            # the JAVA2D renderer, i.e. of the default sketch and the graphics pool's surfaces, can't texture shapes
+            # => draw the marker as text per point
+            p.no_stroke()
+            p.text_align(p.CENTER, p.CENTER)
+            set_fill = self.create_fill_function(plt, p) if argb is None else lambda i: p.fill(int(argb[i]))
+            for i in range(points.shape[0]):
+                set_fill(i)
+                p.text(plt['marker'], points[i, 0], points[i, 1])
+            return
+        img = glyph(self.s, plt['marker'])
+        verts = stamp_uvs(points[:, 0], points[:, 1], img.width, img.height)
+        p.no_stroke()
+        p.texture_mode(p.NORMAL)
+        if argb is None:
+            groups = [(None, slice(None))]
+        else:
+            uniques, inverse = np.unique(argb, return_inverse=True)
+            groups = [(col, np.repeat(inverse == i, 6)) for i, col in enumerate(uniques)]
+        for col, mask in groups:
+            if col is None:
+                self.create_tint_function(plt, p)(0)
+            else:
+                p.tint(int(col))
+            p.begin_shape(p.TRIANGLES)
+            p.texture(img)
+            p.vertices(verts[mask])
+            p.end_shape()
+
+    def per_point_colors(self, plt):
+        """Return the per data point colors of a plot as an ARGB array, or None if the plot uses a single color"""
+        if 'argb' in plt:
+            # already converted, i.e. by .cull()
+            return plt['argb']
+        if plt['color'] is None or self.is_number(plt['color'][0]):
+            return None
+        return colors_to_argb(plt['color'])
 
     def create_fill_function(self, plt, p):
-        if not plt['color']:
+        if plt['color'] is None:
             set_fill = lambda i: p.fill(255)
         elif self.is_number(plt['color'][0]):
             set_fill = lambda i: p.fill(*plt['color'])
@@ -499,8 +1362,17 @@ class Plot:
             set_fill = lambda i: p.fill(*plt['color'][i])
         return set_fill
 
+    def create_tint_function(self, plt, p):
+        if plt['color'] is None:
+            set_tint = lambda i: p.tint(255)
+        elif self.is_number(plt['color'][0]):
+            set_tint = lambda i: p.tint(*plt['color'])
+        else:
+            set_tint = lambda i: p.tint(*plt['color'][i])
+        return set_tint
+
     def create_stroke_function(self, plt, p):
-        if not plt['color']:
+        if plt['color'] is None:
             set_stroke = lambda i: p.stroke(255)
         elif self.is_number(plt['color'][0]):
             set_stroke = lambda i: p.stroke(*plt['color'])
@@ -510,44 +1382,70 @@ class Plot:
         return set_stroke
 
     def is_number(self, var):
-        return isinstance(var, int) or isinstance(var, float)
+        return isinstance(var, (int, float, np.number))
 
     def reset(self):
         self.plots = []
 
+# rendered legend images per (sketch, labels and colors, horizontal, frame), least recently used first
+legend_cache = OrderedDict()
+# ids of the cached legend images returned with to_graphics=True, which stay with the caller when dropped from the cache
+handed_out = set()
+max_cached_legends = 32
+
 def legend(col_lookup:dict, x, y, horizontal=True, to_graphics=False, frame=True, sketch:py5.Sketch=None):
+    """Draw a legend of the labels and colors in col_lookup at x, y.
+    The legend is rendered once into an image that is reused as long as the col_lookup, horizontal and frame stay
+    the same, so drawing an unchanged legend costs a single image() call.
+    With to_graphics=True the legend image is returned instead of drawn. It is never drawn over by another legend."""
     if sketch == None:
         s = py5.get_current_sketch()
     else:
         s = sketch
-    
-    with s.push_style():
-        s.stroke_weight(1);  s.text_size(14)
-        text_height = s.text_ascent() + s.text_descent()
-        labels = list(col_lookup.keys())
-        colors = list(col_lookup.values())
-        label_lengths = [s.text_width(label) for label in labels]
-        color_width = 20
-        offset = 10
-        if horizontal:
-            total_length = sum(label_lengths) + len(labels)*color_width + len(labels)*offset*2
-            total_height = text_height
-        else:
-            total_length = s.text_width(max(labels, key=len)) + color_width + offset*2
-            total_height = len(labels) * (text_height)
+
+    key = (s, tuple((label, tuple(color)) for label, color in col_lookup.items()), horizontal, frame)
+    if key in legend_cache:
+        legend_cache.move_to_end(key)
+    else:
+        legend_cache[key] = render_legend(s, col_lookup, horizontal, frame)
+        while len(legend_cache) > max_cached_legends:
+            (old_sketch, *_), old_img = legend_cache.popitem(last=False)
+            if id(old_img) in handed_out:
+                handed_out.discard(id(old_img))
+            else:
+                graphics_pool(old_sketch).release(old_img)
+    img = legend_cache[key]
     if to_graphics:
-        x, y = 0, 0
-        s = sketch.create_graphics(int(total_length), int(total_height))
-        s.begin_draw()
+        handed_out.add(id(img))
+        return img
+    s.image(img, x, y)
+
+def render_legend(sketch:py5.Sketch, col_lookup:dict, horizontal=True, frame=True):
+    """Render a legend into an offscreen graphics of the sketch's graphics pool"""
+    metrics = text_metrics(sketch, size=14)
+    text_height = metrics.height
+    labels = list(col_lookup.keys())
+    colors = list(col_lookup.values())
+    label_lengths = metrics.widths(labels)
+    color_width = 20
+    offset = 10
+    if horizontal:
+        total_length = sum(label_lengths) + len(labels)*color_width + len(labels)*offset*2
+        total_height = text_height
+    else:
+        total_length = max(label_lengths) + color_width + offset*2
+        total_height = len(labels) * (text_height)
+    s = graphics_pool(sketch).acquire(max(int(total_length), 1), max(int(total_height), 1))
+    s.begin_draw()
+    s.clear()
     s.push_style()
     s.stroke_weight(1);  s.text_size(14)
     s.text_align(s.LEFT, s.TOP)
     s.fill(0);  s.stroke(255)
     if frame:
-        s.rect(x, y, total_length-1, total_height-1)
+        s.rect(0, 0, total_length-1, total_height-1)
     s.fill(255)
     with s.push_matrix():
-        s.translate(x, y)
         for i in range(len(labels)):
             with s.push_style():
                 s.no_stroke(); s.fill(*colors[i])
@@ -561,6 +1459,5 @@ def legend(col_lookup:dict, x, y, horizontal=True, to_graphics=False, frame=True
             else:
                 s.translate(-color_width - 2*offset, text_height)
     s.pop_style()
-    if to_graphics:
-        s.end_draw()
-        return s
\ No newline at end of file
+    s.end_draw()
+    return s
@@ -0,0 +1,121 @@
+import numpy as np
+
+def nearest_sorted(xs:np.ndarray, x) -> int:
+    """the index of the value of the ascending xs closest to x, found with a binary search. None without xs"""
+    n = xs.shape[0]
+    if n == 0:
+        return None
+    i = int(np.searchsorted(xs, x))
+    if i == 0:
+        return 0
+    if i == n:
+        return n - 1
+    return i if xs[i] - x < x - xs[i-1] else i - 1
+
+class GridIndex:
+    """A uniform grid of square cells over 2D points for nearest point queries.
+
+       The points are sorted by their cell once, so the points of a cell are one contiguous run of .order (like the
+       rows of a CSR matrix). A query only measures the distances to the points in the cells around it instead of
+       to all points."""
+    def __init__(self, xs, ys, cell:float=16):
+        self.cell = cell
+        self.xs = np.asarray(xs, dtype=np.float64)
+        self.ys = np.asarray(ys, dtype=np.float64)
+        valid = np.flatnonzero(np.isfinite(self.xs) & np.isfinite(self.ys))
+        cx = np.floor(self.xs[valid] / cell).astype(np.int64)
+        cy = np.floor(self.ys[valid] / cell).astype(np.int64)
+        if valid.shape[0] == 0:
+            self.origin, self.cols, self.rows = (0, 0), 0, 0
+        else:
+            self.origin = (cx.min(), cy.min())
+            self.cols, self.rows = int(cx.max() - cx.min()) + 1, int(cy.max() - cy.min()) + 1
+        keys = (cy - self.origin[1]) * self.cols + (cx - self.origin[0])
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.order = valid[order]
+
+    def candidates(self, x, y, radius) -> np.ndarray:
+        """the indices of all points in the cells within radius of x, y"""
+        r = int(np.ceil(radius / self.cell))
+        cx = np.arange(-r, r + 1) + int(np.floor(x / self.cell)) - self.origin[0]
+        cy = np.arange(-r, r + 1) + int(np.floor(y / self.cell)) - self.origin[1]
+        # cells outside of the grid hold no points and would alias other cells' keys
+        cx = cx[(cx >= 0) & (cx < self.cols)]
+        cy = cy[(cy >= 0) & (cy < self.rows)]
+        keys = (cy[:, None] * self.cols + cx[None, :]).ravel()
+        starts = np.searchsorted(self.keys, keys, side='left')
+        ends = np.searchsorted(self.keys, keys, side='right')
+        runs = [self.order[start:end] for start, end in zip(starts, ends) if end > start]
+        return np.concatenate(runs) if runs else np.zeros(0, dtype=np.int64)
+
+    def nearest(self, x, y, radius:float) -> int:
+        """the index of the point closest to x, y within radius, or None"""
+        idx = self.candidates(x, y, radius)
+        if idx.shape[0] == 0:
+            return None
+        dist = (self.xs[idx] - x)**2 + (self.ys[idx] - y)**2
+        best = int(np.argmin(dist))
+        return int(idx[best]) if dist[best] <= radius**2 else None
+
+class RectGrid:
+    """A uniform grid of square cells over rectangles for point queries, i.e. to find the ui element under the mouse.
+
+       Each rectangle is listed in every cell it overlaps, so a query only tests the few rectangles of the cell of
+       the point instead of all of them. Moving a rectangle only updates the cells of its old and new bounds."""
+    def __init__(self, cell:float=64):
+        self.cell = cell
+        self.cells = {}     # (column, row) => {item: None} in insertion order
+        self.bounds = {}    # item => (x, y, w, h)
+        self.order = {}     # item => insertion count, later items are on top of earlier ones
+        self.count = 0
+
+    def cell_keys(self, x, y, w, h):
+        c0, c1 = int(np.floor(x / self.cell)), int(np.floor((x + w) / self.cell))
+        r0, r1 = int(np.floor(y / self.cell)), int(np.floor((y + h) / self.cell))
+        return [(c, r) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+
+    def move(self, item, x, y, w, h):
+        """insert the item or update its bounds"""
+        if item in self.bounds:
+            if self.bounds[item] == (x, y, w, h):
+                return
+            self.remove(item)
+        if item not in self.order:
+            self.order[item] = self.count
+            self.count += 1
+        self.bounds[item] = (x, y, w, h)
+        for key in self.cell_keys(x, y, w, h):
+            self.cells.setdefault(key, {})[item] = None
+
+    def remove(self, item):
+        if item not in self.bounds:
+            return
+        for key in self.cell_keys(*self.bounds.pop(item)):
+            cell = self.cells[key]
+            cell.pop(item, None)
+            if not cell:
+                del self.cells[key]
+
+    def at(self, x, y, where=None):
+        """the topmost item whose bounds contain x, y (exclusive of the edges), or None. where(item) can exclude items
+        from the query"""
+        if x is None or y is None:
+            return None
+        top = None
+        for item in self.cells.get((int(np.floor(x / self.cell)), int(np.floor(y / self.cell))), ()):
+            bx, by, bw, bh = self.bounds[item]
+            if (bx < x < bx + bw and by < y < by + bh and (top is None or self.order[item] > self.order[top])
+                and (where is None or where(item))):
+                top = item
+        return top
+
+    def overlapping(self, x, y, w, h) -> list:
+        """all items whose bounds overlap the rectangle x, y, w, h"""
+        found = {}
+        for key in self.cell_keys(x, y, w, h):
+            for item in self.cells.get(key, ()):
+                bx, by, bw, bh = self.bounds[item]
+                if bx <= x + w and x <= bx + bw and by <= y + h and y <= by + bh:
+                    found[item] = None
+        return list(found)
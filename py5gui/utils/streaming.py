@@ -0,0 +1,249 @@
+import numpy as np
+
+class RingBuffer:
+    """A fixed capacity buffer of the most recent values, preallocated as a numpy array.
+
+       Every value is written twice, once into each half of an array of 2*capacity. This way the currently held
+       values are always one contiguous slice of the array, which .view() returns without copying or rolling
+       the data, while appending stays O(1)."""
+    def __init__(self, capacity:int, dtype=np.float64):
+        self.capacity = int(capacity)
+        self.data = np.zeros(2 * self.capacity, dtype=dtype)
+        self.head = 0       # index of the next write in the first half
+        self.size = 0
+
+    def append(self, value):
+        self.data[self.head] = value
+        self.data[self.head + self.capacity] = value
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype).ravel()
+        if values.shape[0] > self.capacity:
+            # only the newest values fit
+            values = values[-self.capacity:]
+        n = values.shape[0]
+        if n == 0:
+            return
+        idx = (self.head + np.arange(n)) % self.capacity
+        self.data[idx] = values
+        self.data[idx + self.capacity] = values
+        self.head = (self.head + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def view(self) -> np.ndarray:
+        """the held values from oldest to newest as a read only view into the buffer"""
+        end = self.head + self.capacity
+        v = self.data[end - self.size:end]
+        v.flags.writeable = False
+        return v
+
+    def last(self):
+        return self.data[self.head + self.capacity - 1]
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+class Pyramid:
+    """Min, max and mean of buckets of a series' points at several resolutions, maintained while appending.
+
+       Level 0 holds buckets of factor points, every further level buckets of factor buckets of the level below.
+       Every level keeps up to capacity of its newest buckets in ring buffers, so the memory is bounded while the
+       coarse levels still reach far further back than the raw points. Points are reduced once a bucket is complete,
+       the few points of incomplete buckets wait in .pending."""
+    def __init__(self, capacity:int, levels:int=4, factor:int=4, dtype=np.float64):
+        self.factor = int(factor)
+        self.levels = [{name: RingBuffer(capacity, dtype) for name in ('xs', 'mins', 'maxs', 'means')}
+                       for _ in range(levels)]
+        empty = np.zeros(0, dtype=dtype)
+        # the (xs, mins, maxs, means) of every level's incomplete bucket
+        self.pending = [(empty, empty, empty, empty) for _ in range(levels)]
+
+    def extend(self, xs, ys):
+        xs = np.asarray(xs, dtype=np.float64);     ys = np.asarray(ys, dtype=np.float64)
+        self.feed(0, xs, ys, ys, ys)
+
+    def feed(self, level, xs, mins, maxs, means):
+        """reduce the complete buckets of the new values of a level and pass the results on to the next level"""
+        if level >= len(self.levels):
+            return
+        xs, mins, maxs, means = [np.concatenate((old, new)) for old, new in zip(self.pending[level],
+                                                                                (xs, mins, maxs, means))]
+        f = self.factor
+        full = (xs.shape[0] // f) * f
+        self.pending[level] = (xs[full:], mins[full:], maxs[full:], means[full:])
+        if full == 0:
+            return
+        # a bucket is placed at the x of its first point
+        xs = xs[:full:f]
+        mins = mins[:full].reshape(-1, f).min(axis=1)
+        maxs = maxs[:full].reshape(-1, f).max(axis=1)
+        means = means[:full].reshape(-1, f).mean(axis=1)
+        for name, values in zip(('xs', 'mins', 'maxs', 'means'), (xs, mins, maxs, means)):
+            self.levels[level][name].extend(values)
+        self.feed(level + 1, xs, mins, maxs, means)
+
+    def level(self, i:int) -> tuple:
+        """the (xs, mins, maxs, means) of the buckets of level i as views, from oldest to newest"""
+        buffers = self.levels[i]
+        return tuple(buffers[name].view() for name in ('xs', 'mins', 'maxs', 'means'))
+
+    def pick(self, left, right, pixels:int):
+        """the coarsest level with at least pixels buckets between left and right, or None if no level has as many"""
+        for i in reversed(range(len(self.levels))):
+            xs = self.levels[i]['xs'].view()
+            count = np.searchsorted(xs, right, side='right') - np.searchsorted(xs, left, side='left')
+            if count >= pixels:
+                return i
+        return None
+
+    def envelope(self, i:int, left=None, right=None) -> tuple:
+        """The xs and ys of a line zigzagging between the min and max of every bucket of level i between left and
+        right, plus one bucket on each side. Looks like the line through all points reduced to the same resolution."""
+        xs, mins, maxs, _ = self.level(i)
+        start = 0 if left is None else max(int(np.searchsorted(xs, left, side='left')) - 1, 0)
+        end = xs.shape[0] if right is None else min(int(np.searchsorted(xs, right, side='right')) + 1, xs.shape[0])
+        env_xs = np.repeat(xs[start:end], 2)
+        env_ys = np.empty(env_xs.shape[0], dtype=np.float64)
+        env_ys[0::2] = mins[start:end];     env_ys[1::2] = maxs[start:end]
+        return env_xs, env_ys
+
+    def first_x(self):
+        """the x of the oldest bucket still held by any level, or None"""
+        held = [buffers['xs'].view() for buffers in self.levels if len(buffers['xs']) > 0]
+        return min(xs[0] for xs in held) if held else None
+
+    def clear(self):
+        for buffers in self.levels:
+            for buffer in buffers.values():
+                buffer.clear()
+        self.pending = [tuple(values[:0] for values in pending) for pending in self.pending]
+
+class StreamingSeries:
+    """A series of (x, y) data points that is appended to instead of being rebuilt every frame.
+
+       The series keeps up to capacity of the newest points in preallocated ring buffers. .append(x, y) and
+       .extend(xs, ys) are O(1) per point, older points are dropped once the capacity is reached.
+       .xs and .ys are views into the buffers that the plot can read without copying.
+       With levels > 0 the series additionally maintains a Pyramid of the min, max and mean of buckets of factor**1
+       to factor**levels points. A plot showing more points than it has pixel columns then draws the coarsest
+       sufficient level instead of the raw points, which also reaches further back than the capacity of raw points.
+       Attach a series to a Plot with plot.stream() - it will then be drawn by every following plot.show()."""
+    def __init__(self, capacity:int=10_000, dtype=np.float64, levels:int=0, factor:int=4):
+        self.x_buffer = RingBuffer(capacity, dtype)
+        self.y_buffer = RingBuffer(capacity, dtype)
+        self.pyramid = Pyramid(capacity, levels, factor) if levels > 0 else None
+        # count of all points ever added, can be used to notice new data
+        self.total = 0
+        # whether the xs are in ascending order, kept up to date while appending so the plot never needs to check
+        self.sorted = True
+
+    def append(self, x, y):
+        if len(self) > 0 and x < self.x_buffer.last():
+            self.sorted = False
+        self.x_buffer.append(x)
+        self.y_buffer.append(y)
+        if self.pyramid is not None:
+            self.pyramid.extend([x], [y])
+        self.total += 1
+        return self
+
+    def extend(self, xs, ys):
+        if len(xs) != len(ys):
+            print(f'xs and ys need the same length to extend the series: {len(xs)} != {len(ys)}')
+            return self
+        if len(xs) > 0 and self.sorted:
+            xs = np.asarray(xs)
+            self.sorted = bool(np.all(xs[1:] >= xs[:-1])) and (len(self) == 0 or xs[0] >= self.x_buffer.last())
+        self.x_buffer.extend(xs)
+        self.y_buffer.extend(ys)
+        if self.pyramid is not None:
+            self.pyramid.extend(xs, ys)
+        self.total += len(xs)
+        return self
+
+    def clear(self):
+        self.x_buffer.clear()
+        self.y_buffer.clear()
+        self.sorted = True
+        if self.pyramid is not None:
+            self.pyramid.clear()
+        return self
+
+    def detail(self, left=None, right=None, pixels:int=500):
+        """The xs and ys to draw this series as a line between left and right (default: all held data) over pixels
+        columns. The envelope of the coarsest pyramid level that still has a bucket per pixel column, or None if the
+        raw points should be drawn. If the raw points or that level don't reach back to left, the next finer or
+        coarser level that does is used, or the coarsest level if none does."""
+        if self.pyramid is None or not self.sorted or len(self) == 0:
+            return None
+        if left is None:
+            left, right = self.pyramid.first_x(), self.x_buffer.last()
+            if left is None:
+                return None
+        level = self.pyramid.pick(left, right, pixels)
+        if left < self.xs[0]:
+            # the raw points don't reach back far enough => the finest level at least as coarse as the picked one
+            # that holds the older data
+            levels = self.pyramid.levels
+            held = [i for i in range(len(levels)) if len(levels[i]['xs']) > 0]
+            if held:
+                coarser = [i for i in held if level is None or i >= level]
+                covering = [i for i in coarser if levels[i]['xs'].view()[0] <= left]
+                level = covering[0] if covering else held[-1]
+        if level is None:
+            return None
+        env_xs, env_ys = self.pyramid.envelope(level, left, right)
+        if env_xs.shape[0] == 0:
+            return None
+        # the newest points that don't complete a bucket of the level yet continue the envelope as raw points
+        xs, ys = self.xs, self.ys
+        start = int(np.searchsorted(xs, env_xs[-1], side='right'))
+        end = int(np.searchsorted(xs, right, side='right'))
+        xs, ys = np.concatenate((env_xs, xs[start:end])), np.concatenate((env_ys, ys[start:end]))
+        # the envelope reaches one bucket beyond the window on each side
+        keep = (xs >= left) & (xs <= right)
+        return xs[keep], ys[keep]
+
+    @property
+    def xs(self) -> np.ndarray:
+        return self.x_buffer.view()
+
+    @property
+    def ys(self) -> np.ndarray:
+        return self.y_buffer.view()
+
+    @property
+    def capacity(self) -> int:
+        return self.x_buffer.capacity
+
+    def __len__(self):
+        return len(self.x_buffer)
+
+class StreamingHistogram:
+    """Counts of the ys of a StreamingSeries in fixed bins, that are updated with only the values appended since the
+    last update instead of binning all data again. The counts include every value ever appended to the series, also
+    those that were already dropped from its buffers."""
+    def __init__(self, series:StreamingSeries, edges):
+        self.series = series
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(self.edges.shape[0] - 1, dtype=np.int64)
+        self.seen = 0       # the series' total at the last update
+
+    def update(self) -> np.ndarray:
+        new = self.series.total - self.seen
+        if new > 0:
+            # values that were appended and dropped again between two updates can't be counted anymore
+            values = self.series.ys[len(self.series) - min(new, len(self.series)):]
+            self.counts += np.histogram(values, self.edges)[0]
+            self.seen = self.series.total
+        return self.counts
+
+    def clear(self):
+        self.counts[:] = 0
+        return self
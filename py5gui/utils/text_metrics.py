@@ -0,0 +1,107 @@
+import numpy as np
+
+class TextMetrics:
+    """Text measurements for one font and text size of a sketch, answered in python.
+
+       Every p.text_width() call crosses into java. Processing fonts don't kern, so the width of a text is the sum of
+       its glyph advances. TextMetrics measures every glyph once and caches its advance, so later widths, ascent and
+       descent are computed without calling into the sketch again."""
+    def __init__(self, sketch, font=None, size=None):
+        self.s = sketch
+        self.font, self.size = font, size
+        self.advances = {}
+        with self.scope():
+            self.ascent = self.s.text_ascent()
+            self.descent = self.s.text_descent()
+        self.height = self.ascent + self.descent
+
+    def scope(self):
+        """a style scope of the sketch using this font and size for measuring"""
+        style = self.s.push_style()
+        if self.font is not None:
+            self.s.text_font(self.font)
+        if self.size is not None:
+            self.s.text_size(self.size)
+        return style
+
+    def learn(self, chars):
+        """measure the advances of all not yet known characters"""
+        missing = set(chars).difference(self.advances)
+        if missing:
+            with self.scope():
+                for char in missing:
+                    self.advances[char] = self.s.text_width(char)
+
+    def width(self, text:str) -> float:
+        text = str(text)
+        self.learn(text)
+        return sum(self.advances[char] for char in text)
+
+    def widths(self, texts) -> np.ndarray:
+        """the widths of many texts at once"""
+        texts = [str(text) for text in texts]
+        lengths = np.array([len(text) for text in texts], dtype=np.int64)
+        joined = ''.join(texts)
+        if len(joined) == 0:
+            return np.zeros(len(texts))
+        self.learn(joined)
+        codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32)
+        uniques, inverse = np.unique(codes, return_inverse=True)
+        advances = np.array([self.advances[chr(code)] for code in uniques.tolist()])[inverse.ravel()]
+        # sum the advances of every text, empty texts have a width of 0
+        ends = np.cumsum(lengths)
+        totals = np.r_[0, np.cumsum(advances)]
+        return totals[ends] - totals[ends - lengths]
+
+    def truncate(self, text:str, max_width:float) -> str:
+        """the longest start of text that is narrower than max_width, found with a binary search"""
+        text = str(text)
+        if len(text) == 0:
+            return text
+        self.learn(text)
+        prefix_widths = np.cumsum([self.advances[char] for char in text])
+        return text[:int(np.searchsorted(prefix_widths, max_width, side='left'))]
+
+    def frozen(self) -> 'FrozenMetrics':
+        """a copy of the measurements so far that never calls into the sketch, i.e. for a worker thread"""
+        return FrozenMetrics(self)
+
+class FrozenMetrics(TextMetrics):
+    """The measured advances of a TextMetrics, without access to the sketch. Characters that weren't measured are
+    estimated with the widest known advance."""
+    def __init__(self, metrics:TextMetrics):
+        self.s = None
+        self.font, self.size = metrics.font, metrics.size
+        self.advances = dict(metrics.advances)
+        self.ascent, self.descent, self.height = metrics.ascent, metrics.descent, metrics.height
+
+    def learn(self, chars):
+        missing = set(chars).difference(self.advances)
+        if missing:
+            estimate = max(self.advances.values(), default=self.height / 2)
+            for char in missing:
+                self.advances[char] = estimate
+
+# metrics per (sketch, font, size)
+metrics = {}
+
+def current_text(sketch) -> tuple:
+    """the (font, size) the sketch currently draws text with, as java objects usable as keys"""
+    g = sketch.get_graphics() if hasattr(sketch, 'get_graphics') else sketch
+    try:
+        return g._instance.textFont, float(g._instance.textSize)
+    except AttributeError:
+        return None, None
+
+def text_metrics(sketch, font=None, size=None) -> TextMetrics:
+    """Get the shared TextMetrics of a sketch for a font (None for the sketch's current font) and text size
+    (None for the font's own size, or with font=None the current text size). Without a font the metrics are kept
+    per actual current font and size, so elements and plots using different fonts don't share their widths."""
+    if font is None:
+        current_font, current_size = current_text(sketch)
+        key = (sketch, current_font, size if size is not None else current_size)
+    else:
+        key = (sketch, font, size)
+    if key not in metrics:
+        metrics[key] = TextMetrics(sketch, font, size)
+    return metrics[key]